@@ -3,20 +3,23 @@ from src.parser.station_parser import station_parser
 from src.resolve.BruteForce import BruteForce
 from src.resolve.Progress import Progress
 from src.resolve.BandB import ensemble_dominant, draw_minimum_dominating_set
+from src.resolve.BranchBound import BranchBound
+from src.resolve.Greedy import Greedy
+from src.resolve.Components import solve_by_components
+from src.resolve.Transposition import TableStats
+from functools import partial
 from utils import *
 
 def main():
     O = olympic_parser()
-    S = station_parser()
-    V = S + O
+    consolidation = get_station_consolidation()
+    modes = get_station_modes()
+    S = station_parser(consolidate=consolidation, modes=modes)
 
     x = get_walking_time()
-    G = load_graph(x, filename="processed_graph.pkl")
-
-    if not G:
-        G = load_or_create_graph(V, O, S)
-        G.usefull_edges_time(x)
-        save_graph(G, x)  # Save graph with the current x
+    # The walking distances are computed once, any walking time is a filter over them
+    G = load_or_create_walking_graph(S, O, x, get_network_provider(), oracle=get_distance_oracle(),
+                                     consolidation=consolidation, modes=modes)
 
 
     # Analyze "good" and "bad" Olympic sites
@@ -32,13 +35,16 @@ def main():
 
     method = choose_method()
     solution = None
+    # every solver runs once per independent group of sites, see resolve.Components
     if method == '1':
         print("Running Brute Force...")
-        solution = BruteForce.solve(G)
+        solution = solve_by_components(G, BruteForce.solve)
         G.draw()
     elif method == '2':
         print("Running Progress...")
-        solution = Progress.solve(G)
+        solution = solve_by_components(G, Progress.solve)
+        for s in solution or []:
+            s.belongSolution()
         G.draw()
         if not solution:
             print("No solution found or an error occurred.")
@@ -49,12 +55,27 @@ def main():
 
 
 
-    if method == '3':
-        print("Running Branch and Bound...")
-        solution = ensemble_dominant(G, set(), k=32)
+    if method in {'3', '4', '5'}:
+        stats = TableStats()
+        if method == '3':
+            name = "Branch and Bound"
+            print(f"Running {name}...")
+            solution = solve_by_components(G, partial(ensemble_dominant, S=set(), k=32, memory=get_transposition_memory()),
+                                           stats=stats)
+            print(f"{name} transposition table: {stats}")
+        elif method == '4':
+            name = "Bitset Branch and Bound"
+            print(f"Running {name}...")
+            solution = solve_by_components(G, partial(BranchBound.solve, memory=get_transposition_memory()),
+                                           stats=stats)
+            print(f"{name} transposition table: {stats}")
+        else:
+            name = "Greedy heuristic"
+            print(f"Running {name}...")
+            solution = solve_by_components(G, Greedy.solve)
 
         if not solution:
-            print("No valid solution found by Branch and Bound.")
+            print(f"No valid solution found by {name}.")
         else:
             print(f"Solution size: {len(solution)}")
             print(f"Solution stations: {[station.name for station in solution]}")
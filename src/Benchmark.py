@@ -4,6 +4,10 @@ from src.parser.station_parser import station_parser
 from src.resolve.BruteForce import BruteForce
 from src.resolve.Progress import Progress
 from src.resolve.BandB import ensemble_dominant, draw_minimum_dominating_set
+from src.resolve.BranchBound import BranchBound
+from src.resolve.Greedy import Greedy
+from src.resolve.Transposition import TableStats
+from functools import partial
 from utils import *
 import time
 import csv
@@ -17,16 +21,13 @@ class Benchmark:
 
     def setup(self):
         O = olympic_parser()
-        S = station_parser()
-        V = S + O
+        consolidation = get_station_consolidation()
+        modes = get_station_modes()
+        S = station_parser(consolidate=consolidation, modes=modes)
 
         self.x = get_walking_time()
-        self.G = load_graph(self.x, filename="processed_graph.pkl")
-
-        if not self.G:
-            self.G = load_or_create_graph(V, O, S)
-            self.G.usefull_edges_time(self.x)
-            save_graph(self.G, self.x)
+        self.G = load_or_create_walking_graph(S, O, self.x, get_network_provider(), oracle=get_distance_oracle(),
+                                              consolidation=consolidation, modes=modes)
 
         intermediaire = self.G.goodOlympics()
         nbr_good_olymp, bad_olymp = intermediaire
@@ -56,12 +57,14 @@ class Benchmark:
     def save_results_to_csv(self, results, filename="benchmark_results.csv"):
         with open(filename, mode="w", newline="") as file:
             writer = csv.writer(file)
-            writer.writerow(["number of vertices", "Progress", "Branch and Bound", "Brute Force"])
+            writer.writerow(["number of vertices", "Progress", "Branch and Bound", "Bitset B&B", "Greedy", "Brute Force"])
             for result in results:
                 writer.writerow([
                     result["vertices"],
                     result["average_time_progress"],
                     result["average_time_bab"],
+                    result["average_time_bitset"],
+                    result["average_time_greedy"],
                     result.get("average_time_bf", "N/A")
                 ])
 
@@ -71,8 +74,9 @@ class Benchmark:
             self.console.print(f"Vertices: {result['vertices']} | Edges: {result['edges']} | Walking Time: {result['walking_time']} min")
 
             bars = list(self.print_bar_chart(
-                ["Progress", "Branch and Bound", "Brute Force"],
-                [result['average_time_progress'], result['average_time_bab'], result.get('average_time_bf', -1)]
+                ["Progress", "Branch and Bound", "Bitset B&B", "Greedy", "Brute Force"],
+                [result['average_time_progress'], result['average_time_bab'], result['average_time_bitset'],
+                 result['average_time_greedy'], result.get('average_time_bf', -1)]
             ))
 
             for bar in bars:
@@ -120,7 +124,15 @@ class Benchmark:
             return -1 if exception_raised else total_time / iterations
 
         average_time_progress = measure_time("Progress", Progress.solve, self.G)
-        average_time_bab = measure_time("Branch and Bound", ensemble_dominant, self.G, set(), 32)
+        bab_stats, bitset_stats = TableStats(), TableStats()
+        memory = get_transposition_memory()
+        average_time_bab = measure_time("Branch and Bound", partial(ensemble_dominant, stats=bab_stats, memory=memory),
+                                        self.G, set(), 32)
+        average_time_bitset = measure_time("Bitset B&B", partial(BranchBound.solve, stats=bitset_stats, memory=memory),
+                                           self.G)
+        self.console.print(f"Branch and Bound transposition table: {bab_stats}")
+        self.console.print(f"Bitset B&B transposition table: {bitset_stats}")
+        average_time_greedy = measure_time("Greedy", Greedy.solve, self.G)
 
         average_time_bf = -1
         if brute_force:
@@ -131,7 +143,9 @@ class Benchmark:
             "edges": len(self.G.edges),
             "walking_time": self.x,
             "average_time_progress": average_time_progress,
-            "average_time_bab": average_time_bab
+            "average_time_bab": average_time_bab,
+            "average_time_bitset": average_time_bitset,
+            "average_time_greedy": average_time_greedy
         }
 
         if brute_force:
@@ -1,10 +1,23 @@
 from .Vertex import Vertex
 
 class Edge:
+    __slots__ = ("vertex1", "vertex2", "weight", "route")
+
     def __init__(self, v1: Vertex, v2: Vertex, w: float = 1):
         self.vertex1 = v1
         self.vertex2 = v2
         self.weight = w
+        # Street route as (latitude, longitude) points, only rebuilt for the edges that are drawn
+        # (see network.Routes.attach_routes)
+        self.route = None
+
+    def __setstate__(self, state):
+        # edges pickled before __slots__ carry their attributes in a dictionary, and no route
+        if isinstance(state, tuple):
+            state = dict(state[0] or {}, **state[1])
+        self.route = None
+        for name, value in state.items():
+            setattr(self, name, value)
         
     @staticmethod
     def walking_time_from_distance(distance_meters: float) -> float:
@@ -1,10 +1,19 @@
 import math
 import osmnx as ox 
 class Geopoint:
+    __slots__ = ("latitude", "longitude")
+
     def __init__(self, lat, long) -> None:
         self.latitude = lat
         self.longitude = long
 
+    def __setstate__(self, state):
+        # geopoints pickled before __slots__ carry their attributes in a dictionary
+        if isinstance(state, tuple):
+            state = dict(state[0] or {}, **state[1])
+        for name, value in state.items():
+            setattr(self, name, value)
+
     def __str__(self):
         return f"Geopoint(latitude={self.latitude}, longitude={self.longitude})"
         
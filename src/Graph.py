@@ -2,39 +2,74 @@ from .Edge import Edge
 from .Vertex import Vertex
 from .Station import Station
 from .Olympic import Olympic
+from .GraphCore import GraphCore, CoverageState, pack_graph, unpack_graph
+from .Kernel import Kernel
+from .network.DistanceTable import DistanceTable
+from .network.Delta import apply_delta
+from .network.Snapping import SnapTable
+from .network.Candidates import candidate_pairs
+from .network.WalkGraph import WalkGraph
+from .network.Provider import OverpassProvider
+from .network.Routes import attach_routes, edge_locations
 from tqdm import tqdm
 import folium
-import osmnx as ox
-import networkx as nx
-from geopy.distance import geodesic
 from bitarray import bitarray
 from bitarray.util import ba2int, subset, zeros
-ox.settings.timeout = 180  
-ox.settings.overpass_rate_limit = True
-ox.settings.overpass_endpoint = "https://overpass.kumi.systems/api/interpreter"
+
+WALKING_SPEED = 75  # Meters per minute, Graph2.MPS * 60
+
 class Graph:
-    def __init__(self, vertices: list[Vertex], olympics: list[Olympic], stations: list[Station], edges: list[Edge] = [], name="default_name"):
+    network_provider = None
+    core = None
+
+    def __init__(self, vertices: list[Vertex], olympics: list[Olympic], stations: list[Station], edges: list[Edge] = None, name="default_name"):
         self.vertices = vertices
         self.olympics = olympics
         self.progressOlympics = []
         self.stations = stations
-        self.edges = edges
+        self.edges = list(edges) if edges is not None else []
         self.cached_edges = []
 
+    def __getstate__(self):
+        # vertices and edges are pickled as columns, see GraphCore.pack_graph
+        return pack_graph(self)
+
+    def __setstate__(self, state):
+        if "vertex_columns" in state:
+            unpack_graph(self, state)
+        else:
+            self.__dict__.update(state)  # graphs pickled object by object
+
+    def get_core(self):
+        """Station/site adjacency as CSR arrays (see GraphCore), built once per set of edges."""
+        if self.core is None:
+            self.core = GraphCore.from_edges(self.getStations(), self.getOlympics(), self.edges)
+        return self.core
+
+    def get_coverage(self):
+        """Read-only station x site coverage bit-matrix of the current edges, see GraphCore.CoverageMatrix."""
+        return self.get_core().coverage_matrix(self.getStations(), self.getOlympics())
+
+    def get_kernel(self):
+        """Reduced instance the solvers search, with its forced stations, see Kernel.Kernel."""
+        core = self.get_core()
+        if core.kernel is None:
+            core.kernel = Kernel.reduce(core, self.get_coverage())
+        return core.kernel
+
     #a set is Solution of Accessibility if it dominates the subgraph of Olympic sites
     #this function checks the vincinity of a potential solution A
     #if all olympic sites are in the vincinity of A, then A is a solution of Accessibility
     def isSolutionOfAccessibility(self, A):
-        visited = set()
-        for a in A:
-            visited = visited.union(self.get_neighbors(a))
-        return (set(self.olympics).issubset(visited))
+        # cover counts of the sites, see GraphCore.CoverageState
+        return CoverageState(self.get_coverage(), A).all_covered()
     
     def are_adjacent(self, v1 : Vertex, v2 : Vertex):
-        for e in self.edges:
-            if (e.vertex1 == v1 and e.vertex2 == v2) or (e.vertex1 == v2 and e.vertex2 == v1):
-                return True
-        return False
+        adjacent = self.get_coverage().adjacent(v1, v2)
+        if adjacent is None:
+            # pairs outside the station x site matrix, the adjacency sets answer in O(1) too
+            return v1.isadja(v2)
+        return adjacent
 
     def get_neighbors(self, v : Vertex):
         neighbors = v.getadja()
@@ -71,6 +106,7 @@ class Graph:
     def changeOlympics(self, new_olympics):
 
         self.olympics = new_olympics
+        self.core = None
     
     def goodOlympics(self):
 
@@ -95,57 +131,104 @@ class Graph:
 
     def addprogressOlympics(self, newOlympics):
         self.progressOlympics.append(newOlympics)
+
+    def set_network_provider(self, provider):
+        self.network_provider = provider
+
+    def get_network_provider(self):
+        if self.network_provider is None:
+            self.network_provider = OverpassProvider()
+        return self.network_provider
     
     def usefull_edges_time(self, minutes_de_marches):
         """
         Calculate edges between stations and Olympic sites based on a double threshold:
-        1. Geodesic distance filter.
+        1. Straight-line distance filter, vectorized over all the stations.
         2. Walking distance using `osmnx`.
         """
-        walking_speed = 75  # Meters per minute
-        geodesic_threshold = walking_speed * minutes_de_marches  # Max geodesic distance in meters
+        geodesic_threshold = WALKING_SPEED * minutes_de_marches  # Max geodesic distance in meters
 
         olympics = self.getOlympics()
         stations = self.getStations()
-        for olymp in tqdm(olympics, desc="Processing Olympic sites"):
+        self.core = None
+        # Step 1: stations within the straight-line threshold of every site
+        pairs = candidate_pairs(stations, olympics, geodesic_threshold)
+        for o, olymp in enumerate(tqdm(olympics, desc="Processing Olympic sites")):
+            near, _ = pairs.site_pairs(o)
+            if len(near) == 0:
+                continue
+            near = near.tolist()
+
             # Create a walking network graph for each Olympic site
-            G = ox.graph_from_point(
+            G = self.get_network_provider().network(
                 (olymp.geopoint.latitude, olymp.geopoint.longitude),
-                dist=geodesic_threshold,
-                network_type='walk'
+                geodesic_threshold
             )
+            if len(G) == 0:
+                continue  # area not covered by the network source
+            # Snap the site and its candidate stations to the network in one query
+            walk = WalkGraph.from_networkx(G)
+            snap = SnapTable(G, [olymp.geopoint] + [stations[i].geopoint for i in near]).reindex(walk)
+
+            # Step 2: Walking distance filter, one search from the site bounded by the threshold
+            distances = walk.shortest_paths(snap.node(0), geodesic_threshold, targets=snap.nodes[1:].tolist())
+            for k, i in enumerate(near):
+                node = snap.node(k + 1)
+                if node not in distances:
+                    continue  # Skip if no walking path within the threshold exists
+
+                # Calculate walking time and create edge
+                station = stations[i]
+                walking_time = distances[node] / WALKING_SPEED
+                edge = Edge(station, olymp, walking_time)
+                self.edges.append(edge)
+                self.cached_edges.append(edge) 
+                station.addadja(olymp)
+                olymp.addadja(station)
+
+    def usefull_edges_shared(self, minutes_de_marches):
+        """
+        Calculate the same edges as `usefull_edges_time`, loading one walk network per cluster
+        of overlapping Olympic sites and running one bounded search per site on it.
+        """
+        table = DistanceTable.build(self.getStations(), self.getOlympics(), WALKING_SPEED * minutes_de_marches, self.get_network_provider())
+        self.apply_distance_table(table, minutes_de_marches)
 
-            for station in stations:
-                # Step 1: Geodesic distance filter
-                geodesic_distance = geodesic(
-                    (station.geopoint.latitude, station.geopoint.longitude),
-                    (olymp.geopoint.latitude, olymp.geopoint.longitude)
-                ).meters
-
-                if geodesic_distance > geodesic_threshold:
-                    continue  # Skip if outside the geodesic threshold
-
-                try:
-                    # Step 2: Walking distance filter using `osmnx`
-                    origin_node = ox.distance.nearest_nodes(G, station.geopoint.longitude, station.geopoint.latitude)
-                    destination_node = ox.distance.nearest_nodes(G, olymp.geopoint.longitude, olymp.geopoint.latitude)
-                    walking_distance = nx.shortest_path_length(G, origin_node, destination_node, weight='length')
-
-                    if walking_distance <= geodesic_threshold:
-                        # Calculate walking time and create edge
-                        walking_time = walking_distance / walking_speed
-                        edge = Edge(station, olymp, walking_time)
-                        self.edges.append(edge)
-                        self.cached_edges.append(edge) 
-                        station.addadja(olymp)
-                        olymp.addadja(station)
-
-                except (nx.NetworkXNoPath, KeyError):
-                    # Skip if no valid walking path exists
-                    continue
-
-
+    def apply_distance_table(self, table, minutes_de_marches):
+        """
+        Create the edges for a walking time out of precomputed walking distances, without any
+        network work. `table` must have been computed for at least this walking time.
+        """
+        olympics = self.getOlympics()
+        stations = self.getStations()
+        links = list(table.within(WALKING_SPEED * minutes_de_marches))
+        for s, o, walking_distance in links:
+            station, olymp = stations[s], olympics[o]
+            edge = Edge(station, olymp, walking_distance / WALKING_SPEED)
+            self.edges.append(edge)
+            self.cached_edges.append(edge)
+            station.addadja(olymp)
+            olymp.addadja(station)
+        if self.core is None and len(self.edges) == len(links):
+            # the table already speaks in station and site positions
+            self.core = GraphCore(len(stations), len(olympics), [l[0] for l in links], [l[1] for l in links],
+                                  [l[2] / WALKING_SPEED for l in links])
+        else:
+            self.core = None
+
+    def update_datasets(self, stations, olympics, minutes_de_marches):
+        """
+        Patch the graph for re-parsed datasets: only the pairs of added or moved stations and
+        sites are computed again, see `network.Delta.apply_delta`.
+        """
+        return apply_delta(self, stations, olympics, WALKING_SPEED * minutes_de_marches, self.get_network_provider(), WALKING_SPEED)
 
+    def clear_edges(self):
+        for v in self.vertices:
+            v.clearadja()
+        self.edges = []
+        self.cached_edges = []
+        self.core = None
 
     def verify_station_olympic_link(self):
         """Check that at least one station is linked to an Olympic site."""
@@ -214,24 +297,26 @@ class Graph:
                     ).add_to(folium_map)
 
 
+        # what to put in the if() in order to print all stations: (edge.vertex1.get_color() in('red', 'blue') and edge.vertex2.get_color() in('red', 'blue')) or (edge.vertex1.get_color() in('red', 'green') and edge.vertex2.get_color() in('red', 'green'))
+        # what to put in the if() in order to print only solution stations: (edge.vertex1.get_color() in('red', 'green') and edge.vertex2.get_color() in('red', 'green'))
+        drawn = [edge for edge in self.cached_edges
+                 if edge.vertex1.get_color() in('red', 'green') and edge.vertex2.get_color() in('red', 'green')] #verify if the edge connect an olympic site to a station to modify
+        # Street routes are only rebuilt for the edges that are drawn
+        attach_routes(drawn, self.get_network_provider())
+
         # Plot edges as lines with walking time
-        for edge in tqdm(self.cached_edges, desc="Drawing edges"):
-
-            # what to put in the if() in order to print all stations: (edge.vertex1.get_color() in('red', 'blue') and edge.vertex2.get_color() in('red', 'blue')) or (edge.vertex1.get_color() in('red', 'green') and edge.vertex2.get_color() in('red', 'green'))
-            # what to put in the if() in order to print only solution stations: (edge.vertex1.get_color() in('red', 'green') and edge.vertex2.get_color() in('red', 'green'))
-            if((edge.vertex1.get_color() in('red', 'green') and edge.vertex2.get_color() in('red', 'green'))): #verify if the edge connect an olympic site to a station to modify
-                total_seconds = round(edge.weight * 60)  # Convert minutes to total seconds
-                minutes = total_seconds // 60
-                seconds = total_seconds % 60
-                #print(f"Drawing edge between {edge.vertex1.name} and {edge.vertex2.name} with color {edge.vertex1.get_color()}")
-                folium.PolyLine(
-                    locations=[(edge.vertex1.geopoint.latitude, edge.vertex1.geopoint.longitude),
-                            (edge.vertex2.geopoint.latitude, edge.vertex2.geopoint.longitude)],
-                    color="black",
-                    weight=2,
-                    opacity=1,
-                    tooltip=f"Walking time: {minutes} mins {seconds} secs"  # Updated tooltip format
-                                                ).add_to(folium_map)
+        for edge in tqdm(drawn, desc="Drawing edges"):
+            total_seconds = round(edge.weight * 60)  # Convert minutes to total seconds
+            minutes = total_seconds // 60
+            seconds = total_seconds % 60
+            #print(f"Drawing edge between {edge.vertex1.name} and {edge.vertex2.name} with color {edge.vertex1.get_color()}")
+            folium.PolyLine(
+                locations=edge_locations(edge),
+                color="black",
+                weight=2,
+                opacity=1,
+                tooltip=f"Walking time: {minutes} mins {seconds} secs"  # Updated tooltip format
+                                            ).add_to(folium_map)
 
         folium_map.save("map.html")  
         return folium_map 
@@ -242,14 +327,12 @@ class Graph:
         self.usefull_edges_time(minutes_de_marches)
     
     def makeprofile(self, station: Station):
-        olympics = self.getOlympics()
-        profile_index = 0
-        copy = zeros(len(olympics))
-
-        for olymp in olympics:
-            if station.isadja(olymp):
+        coverage = self.get_coverage()
+        copy = zeros(len(coverage.sites))
+        s = coverage.station_index.get(id(station))
+        if s is not None:
+            for profile_index in coverage.sites_of(s):
                 copy[profile_index]=1
-            profile_index +=1
         station.setprofile(copy)
     
     def makeprofiles(self):
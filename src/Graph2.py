@@ -2,6 +2,17 @@ from .Edge import Edge
 from .Vertex import Vertex
 from .Station import Station
 from .Olympic import Olympic
+from .GraphCore import GraphCore, CoverageState, pack_graph, unpack_graph
+from .Kernel import Kernel
+from .network.DistanceTable import DistanceTable
+from .network.Delta import apply_delta
+from .network.Snapping import SnapTable
+from .network.Candidates import candidate_pairs
+from .network.Provider import OverpassProvider
+from .network.WalkGraph import WalkGraph
+from .network.EdgeBuilder import network_tasks, search_sites
+from .network.ParallelBuilder import parallel_searches, parallel_network_distances
+from .network.Routes import attach_routes, edge_locations
 import math
 import osmnx as ox
 import networkx as nx
@@ -10,21 +21,50 @@ import random
 from tqdm import tqdm
 import functools
 from bitarray.util import zeros
-from concurrent.futures import ProcessPoolExecutor, as_completed
 
 MPS = 1.25
 
 class Graph:  
-  def __init__(self, vertices: list[Vertex], olympics: list[Olympic], stations: list[Station], edges: list[Edge] = [], name="default_name", threaded=False):
+  network_provider = None
+  core = None
+
+  def __init__(self, vertices: list[Vertex], olympics: list[Olympic], stations: list[Station], edges: list[Edge] = None, name="default_name", threaded=False):
     self.vertices = vertices
     self.olympics = olympics
     self.stations = stations
-    self.edges = edges
+    self.edges = list(edges) if edges is not None else []
     self.cached_edges = []
     self.max_distance = 1000
     self.threaded = threaded
     self.name = name
     self.progressOlympics = []
+
+  def __getstate__(self):
+    # vertices and edges are pickled as columns, see GraphCore.pack_graph
+    return pack_graph(self)
+
+  def __setstate__(self, state):
+    if "vertex_columns" in state:
+      unpack_graph(self, state)
+    else:
+      self.__dict__.update(state)  # graphs pickled object by object
+
+  def get_core(self):
+    """Station/site adjacency as CSR arrays (see GraphCore), built once per set of edges."""
+    if self.core is None:
+      self.core = GraphCore.from_edges(self.getStations(), self.getOlympics(), self.edges)
+    return self.core
+
+  def get_coverage(self):
+    """Read-only station x site coverage bit-matrix of the current edges, see GraphCore.CoverageMatrix."""
+    return self.get_core().coverage_matrix(self.getStations(), self.getOlympics())
+
+  def get_kernel(self):
+    """Reduced instance the solvers search, with its forced stations, see Kernel.Kernel."""
+    core = self.get_core()
+    if core.kernel is None:
+      core.kernel = Kernel.reduce(core, self.get_coverage())
+    return core.kernel
     
   def getStations(self):
     if(not hasattr(self, "stations")):
@@ -43,16 +83,15 @@ class Graph:
     return self.olympics
 
   def isSolutionOfAccessibility(self, A):
-    visited = set()
-    for a in A:
-      visited = visited.union(self.get_neighbors(a))
-    return (set(self.olympics).issubset(visited))
+    # cover counts of the sites, see GraphCore.CoverageState
+    return CoverageState(self.get_coverage(), A).all_covered()
   
   def are_adjacent(self, v1 : Vertex, v2 : Vertex):
-    for e in self.edges:
-      if (e.vertex1 == v1 and e.vertex2 == v2) or (e.vertex1 == v2 and e.vertex2 == v1):
-        return True
-    return False
+    adjacent = self.get_coverage().adjacent(v1, v2)
+    if adjacent is None:
+      # pairs outside the station x site matrix, the adjacency sets answer in O(1) too
+      return v1.isadja(v2)
+    return adjacent
 
   def get_neighbors(self, v : Vertex):
     return v.getadja()
@@ -107,6 +146,7 @@ class Graph:
   
   def changeOlympics(self, new_olympics):
     self.olympics = new_olympics
+    self.core = None
   
   def has_neighbours_station(self,v: Vertex):
     neighbors = v.getadja()
@@ -133,86 +173,128 @@ class Graph:
 
   def set_multi_threading(self, threaded):
     self.threaded = threaded
+
+  def set_network_provider(self, provider):
+    self.network_provider = provider
+
+  def get_network_provider(self):
+    if self.network_provider is None:
+      self.network_provider = OverpassProvider()
+    return self.network_provider
     
   def calculate(self):
     graph_center = (
             sum(v.geopoint.latitude for v in self.vertices) / len(self.vertices),
             sum(v.geopoint.longitude for v in self.vertices) / len(self.vertices)
         )
-    graph = ox.graph_from_point(graph_center, dist=self.get_distance_threshold(), network_type='walk')
-    edges = []
+    graph = self.get_network_provider().network(graph_center, self.get_distance_threshold())
+    if len(graph) == 0:
+      return
+    stations = self.getStations()
+    olympics = self.getOlympics()
+    max_distance = self.get_distance_threshold()
+    pairs = candidate_pairs(stations, olympics, max_distance)
+    walk, tasks = network_tasks(graph, stations, olympics, list(range(len(olympics))), pairs)
     if self.threaded:
-      with ProcessPoolExecutor() as executor:
-        future_to_olympic = {
-          executor.submit(self.calculate_olympic_site, o, graph): o for o in self.getOlympics()
-        }
-
-        for future in as_completed(future_to_olympic):
-          o = future_to_olympic[future]
-          try:
-            result = future.result()
-            edges.extend(result)
-          except Exception as e:
-            print(f"Exception for {o}: {e}")
-        self.cached_edges = edges
-        self.edges = self.edges + edges
+      self.add_links(parallel_searches([(walk, tasks)], max_distance))
     else:
-      for o in tqdm(enumerate(self.getOlympics()), desc="Processing Olympic sites"):
-        edges += self.calculate_olympic_site(o, graph)
-      self.cached_edges = edges
-      self.edges = self.edges + edges
+      self.add_links(search_sites(walk, tasks, max_distance))
   
   def usefull_edges_time(self, minutes):
     self.set_restriction_minutes(minutes)
     edges = []
     if(self.threaded):
-      with ProcessPoolExecutor() as executor:
-        future_to_olympic = {
-          executor.submit(
-            self.calculate_olympic_site, o, ox.graph_from_point(
-              (o.geopoint.latitude, o.geopoint.longitude),
-              dist=self.get_distance_threshold(),
-              network_type='walk')
-            ): o for o in tqdm(enumerate(self.getOlympics()), desc="Processing Olympic sites")
-        }
-
-        for future in as_completed(future_to_olympic):
-          o = future_to_olympic[future]
-          try:
-            result = future.result()
-            edges.extend(result)
-          except Exception as e:
-            print(f"Exception for {o}: {e}")
-        self.cached_edges = edges
-        self.edges = self.edges + edges
+      # workers read the shared networks from shared memory and send back (station, site, distance)
+      self.add_links(parallel_network_distances(self.getStations(), self.getOlympics(), self.get_distance_threshold(), self.get_network_provider()))
     else:
       for o in tqdm(enumerate(self.getOlympics()), desc="Processing Olympic sites"):
         olympic = o[1].geopoint
-        graph = ox.graph_from_point((olympic.latitude, olympic.longitude), dist=self.get_distance_threshold(), network_type='walk')
+        graph = self.get_network_provider().network((olympic.latitude, olympic.longitude), self.get_distance_threshold())
         edges += self.calculate_olympic_site(o, graph)
       self.cached_edges = edges
-      self.edges = self.edges + edges
+      self.edges.extend(edges)
+      self.core = None
     
+  def usefull_edges_shared(self, minutes):
+    """
+    Same edges as `usefull_edges_time`, but overlapping Olympic sites share one walk network
+    and every site runs a single search bounded by the distance threshold.
+    """
+    table = DistanceTable.build(self.getStations(), self.getOlympics(), minutes * 60 * MPS, self.get_network_provider())
+    self.apply_distance_table(table, minutes)
+
+  def usefull_edges_oracle(self, minutes, oracle):
+    """
+    Same edges as `usefull_edges_shared`, every candidate pair being a point-to-point query to
+    a precomputed `network.Oracle.LandmarkOracle` instead of a search on a loaded network.
+    """
+    table = DistanceTable.from_oracle(oracle, self.getStations(), self.getOlympics(), minutes * 60 * MPS)
+    self.apply_distance_table(table, minutes)
+
+  def apply_distance_table(self, table, minutes):
+    """
+    Create the edges for a walking time out of precomputed walking distances, without any
+    network work. `table` must have been computed for at least this walking time.
+    """
+    self.set_restriction_minutes(minutes)
+    self.add_links(table.within(self.get_distance_threshold()))
+
+  def add_links(self, links):
+    """Create the edges of (station index, site index, walking distance in meters) triples."""
+    stations = self.getStations()
+    olympics = self.getOlympics()
+    edges = []
+    for s, o, distance in links:
+      edges.append(self.link(stations[s], olympics[o], distance))
+    self.cached_edges = edges
+    self.edges.extend(edges)
+    self.core = None
+
+  def update_datasets(self, stations, olympics):
+    """
+    Patch the graph for re-parsed datasets: only the pairs of added or moved stations and
+    sites are computed again, see `network.Delta.apply_delta`.
+    """
+    return apply_delta(self, stations, olympics, self.get_distance_threshold(), self.get_network_provider(), MPS * 60)
+
+  def clear_edges(self):
+    for v in self.vertices:
+      v.clearadja()
+    self.edges = []
+    self.cached_edges = []
+    self.core = None
+
+  def link(self, station, olympic, distance):
+    walking_time = distance / (MPS * 60)
+    edge = Edge(station, olympic, walking_time)
+    station.addadja(olympic)
+    olympic.addadja(station)
+    return edge
+
   def calculate_olympic_site(self, o, graph):
+      if len(graph) == 0:
+        return []
       olympic = o[1].geopoint
-      source_node = ox.distance.nearest_nodes(graph, olympic.longitude, olympic.latitude)
-      distances, paths = nx.single_source_dijkstra(graph, source_node, weight="length")
+      stations = self.getStations()
+      # only the stations within straight-line reach are snapped and looked up
+      near, _ = candidate_pairs(stations, [o[1]], self.get_distance_threshold()).site_pairs(0)
+      near = near.tolist()
+      walk = WalkGraph.from_networkx(graph)
+      snap = SnapTable(graph, [olympic] + [stations[i].geopoint for i in near]).reindex(walk)
+      source_node = snap.node(0)
+      # bounded search that stops once every candidate station is settled, distances only
+      distances = walk.shortest_paths(source_node, self.get_distance_threshold(), targets=snap.nodes[1:].tolist())
       edges = []
       
-      for s in self.getStations():
-        station = s.geopoint
-        distance_harversine = self.haversine(olympic.longitude, olympic.latitude, station.longitude, station.latitude)
-        # print('distance vol d"oiseau: ', distance_harversine)
-        if distance_harversine <= self.get_distance_threshold():
-          # print('distance vol d"oiseau inf max')
-          node = ox.distance.nearest_nodes(graph, station.longitude, station.latitude)
-          if node in distances and distances[node] <= self.get_distance_threshold():
-            walking_time = distances[node] / (MPS * 60)
-            # print('Création du lien avec la station : ', selected_stations[selected_stations_ids.index(node)].name, distances[node])
-            edge = Edge(s, o[1], walking_time)
-            edges.append(edge)
-            s.addadja(o[1])
-            o[1].addadja(s)
+      for k, i in enumerate(near):
+        s = stations[i]
+        node = snap.node(k + 1)
+        if node in distances:
+          walking_time = distances[node] / (MPS * 60)
+          edge = Edge(s, o[1], walking_time)
+          edges.append(edge)
+          s.addadja(o[1])
+          o[1].addadja(s)
         
       return edges
 
@@ -259,31 +341,31 @@ class Graph:
             icon=folium.Icon(color=color)
           ).add_to(folium_map)
 
-    for edge in tqdm(self.cached_edges, desc="Drawing edges"):
-      if((edge.vertex1.get_color() in('red', 'green') and edge.vertex2.get_color() in('red', 'green'))): #verify if the edge connect an olympic site to a station to modify
-        total_seconds = round(edge.weight * 60)  # Convert minutes to total seconds
-        minutes = total_seconds // 60
-        seconds = total_seconds % 60
-
-        folium.PolyLine(
-          locations=[(edge.vertex1.geopoint.latitude, edge.vertex1.geopoint.longitude),
-                  (edge.vertex2.geopoint.latitude, edge.vertex2.geopoint.longitude)],
-          color="black",
-          weight=2,
-          opacity=1,
-          tooltip=f"Walking time: {minutes} mins {seconds} secs").add_to(folium_map)
+    drawn = [edge for edge in self.cached_edges
+             if edge.vertex1.get_color() in('red', 'green') and edge.vertex2.get_color() in('red', 'green')] #verify if the edge connect an olympic site to a station to modify
+    # Street routes are only rebuilt for the edges that are drawn
+    attach_routes(drawn, self.get_network_provider(), MPS * 60)
+    for edge in tqdm(drawn, desc="Drawing edges"):
+      total_seconds = round(edge.weight * 60)  # Convert minutes to total seconds
+      minutes = total_seconds // 60
+      seconds = total_seconds % 60
+
+      folium.PolyLine(
+        locations=edge_locations(edge),
+        color="black",
+        weight=2,
+        opacity=1,
+        tooltip=f"Walking time: {minutes} mins {seconds} secs").add_to(folium_map)
     folium_map.save("map.html")  
     return folium_map 
   
   def makeprofile(self, station: Station):
-    olympics = self.getOlympics()
-    profile_index = 0
-    copy = zeros(len(olympics))
-
-    for olymp in olympics:
-        if station.isadja(olymp):
-            copy[profile_index]=1
-        profile_index +=1
+    coverage = self.get_coverage()
+    copy = zeros(len(coverage.sites))
+    s = coverage.station_index.get(id(station))
+    if s is not None:
+      for profile_index in coverage.sites_of(s):
+        copy[profile_index]=1
     station.setprofile(copy)
 
   def makeprofiles(self):
@@ -314,6 +396,7 @@ class Graph:
       for edge in self.edges:
         if edge.isIncident(v):
           self.edges.remove(edge)
+    self.core = None
 
     self.goodOlympics()
 
@@ -0,0 +1,362 @@
+import numpy as np
+from bitarray import bitarray
+
+from .Edge import Edge
+from .Geopoint import Geopoint
+from .Station import Station
+from .Olympic import Olympic
+
+# Graph attributes holding lists of vertices, pickled as positions in `vertices`
+VERTEX_LISTS = ("vertices", "stations", "olympics", "progressOlympics")
+# Graph attributes never pickled: the network source may hold a whole walk network
+TRANSIENT = ("network_provider", "core")
+
+
+class GraphCore:
+    """
+    Station/site adjacency of a graph as two compressed sparse row (CSR) tables.
+
+    Stations and sites are interned to their position in the graph's station and site lists.
+    The sites of station `s` are `station_sites[station_indptr[s]:station_indptr[s + 1]]`,
+    sorted, with the walking times (minutes) of the edges in `station_weights`; `site_indptr`,
+    `site_stations` and `site_weights` give the same edges from the site side.
+    """
+
+    __slots__ = ("station_count", "site_count", "station_indptr", "station_sites", "station_weights",
+                 "site_indptr", "site_stations", "site_weights", "coverage", "kernel")
+
+    def __init__(self, station_count, site_count, station, site, weight):
+        station = np.asarray(station, dtype=np.int32)
+        site = np.asarray(site, dtype=np.int32)
+        weight = np.asarray(weight, dtype=float)
+
+        # keep the lightest of the duplicated edges
+        order = np.lexsort((weight, site, station))
+        station, site, weight = station[order], site[order], weight[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (station[1:] != station[:-1]) | (site[1:] != site[:-1])
+        station, site, weight = station[first], site[first], weight[first]
+
+        self.station_count = station_count
+        self.site_count = site_count
+        self.station_indptr = self.indptr(station, station_count)
+        self.station_sites = site
+        self.station_weights = weight
+
+        by_site = np.lexsort((station, site))
+        self.site_indptr = self.indptr(site, site_count)
+        self.site_stations = station[by_site]
+        self.site_weights = weight[by_site]
+        self.coverage = None
+        self.kernel = None  # see Kernel.Kernel
+
+    @staticmethod
+    def indptr(rows, count):
+        indptr = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=count), out=indptr[1:])
+        return indptr
+
+    @classmethod
+    def from_edges(cls, stations, sites, edges):
+        """Intern the vertices of `Edge` objects to their position in `stations` and `sites`."""
+        station_index = {id(s): i for i, s in enumerate(stations)}
+        site_index = {id(o): i for i, o in enumerate(sites)}
+        station, site, weight = [], [], []
+        for edge in edges:
+            s, o = edge.vertex1, edge.vertex2
+            if id(s) not in station_index:
+                s, o = o, s
+            if id(s) in station_index and id(o) in site_index:
+                station.append(station_index[id(s)])
+                site.append(site_index[id(o)])
+                weight.append(edge.weight)
+        return cls(len(stations), len(sites), station, site, weight)
+
+    def __len__(self):
+        return len(self.station_sites)
+
+    def sites_of(self, s):
+        """Positions of the sites within reach of station `s`, sorted."""
+        return self.station_sites[self.station_indptr[s]:self.station_indptr[s + 1]]
+
+    def stations_of(self, o):
+        """Positions of the stations within reach of site `o`, sorted."""
+        return self.site_stations[self.site_indptr[o]:self.site_indptr[o + 1]]
+
+    def weight(self, s, o):
+        """Walking time between station `s` and site `o`, None when they are not adjacent."""
+        start, end = self.station_indptr[s], self.station_indptr[s + 1]
+        k = start + np.searchsorted(self.station_sites[start:end], o)
+        if k < end and self.station_sites[k] == o:
+            return float(self.station_weights[k])
+        return None
+
+    def coverage_matrix(self, stations, sites):
+        """The `CoverageMatrix` of this adjacency, built on first use."""
+        if self.coverage is None:
+            self.coverage = CoverageMatrix(stations, sites, self)
+        return self.coverage
+
+    def triples(self):
+        """(station position, site position, walking time) of every edge."""
+        station = np.repeat(np.arange(self.station_count, dtype=np.int32), np.diff(self.station_indptr))
+        return zip(station.tolist(), self.station_sites.tolist(), self.station_weights.tolist())
+
+
+class CoverageMatrix:
+    """
+    Read-only station x site coverage bit-matrix, built once from a `GraphCore`.
+
+    Row `s` is a Python int whose bit `o` is set when station `s` covers site `o`, so the set
+    of sites covered by any group of stations is an OR of integers and a complete cover is a
+    comparison with `full`. The transposed rows (bit `s` of `site_masks[o]`) give the stations
+    of a site. Vertex objects map to their row in O(1) through `station_index`/`site_index`.
+    """
+
+    __slots__ = ("stations", "sites", "station_index", "site_index", "station_masks", "site_masks",
+                 "degrees", "full", "station_sites", "order", "rank", "rank_masks")
+
+    def __init__(self, stations, sites, core):
+        self.stations = tuple(stations)
+        self.sites = tuple(sites)
+        self.station_index = {id(s): i for i, s in enumerate(stations)}
+        self.site_index = {id(o): i for i, o in enumerate(sites)}
+        self.station_masks = tuple(self.mask(core.sites_of(s).tolist()) for s in range(len(stations)))
+        self.site_masks = tuple(self.mask(core.stations_of(o).tolist()) for o in range(len(sites)))
+        self.degrees = tuple(np.diff(core.site_indptr).tolist())
+        self.full = (1 << len(sites)) - 1
+        self.station_sites = tuple(tuple(core.sites_of(s).tolist()) for s in range(len(stations)))
+        # sites by increasing number of stations (ties in site order), see CoverageState
+        self.order = tuple(sorted(range(len(sites)), key=lambda o: self.degrees[o]))
+        self.rank = tuple(np.argsort(np.array(self.order, dtype=np.int64), kind="stable").tolist())
+        self.rank_masks = tuple(self.mask(self.rank[o] for o in sites) for sites in self.station_sites)
+
+    @staticmethod
+    def mask(positions):
+        mask = 0
+        for p in positions:
+            mask |= 1 << p
+        return mask
+
+    @staticmethod
+    def positions(mask):
+        """Positions of the set bits of a mask, in increasing order."""
+        result = []
+        while mask:
+            low = mask & -mask
+            result.append(low.bit_length() - 1)
+            mask ^= low
+        return result
+
+    def covers(self, s, o):
+        return self.station_masks[s] >> o & 1 == 1
+
+    def adjacent(self, v1, v2):
+        """
+        Whether a station and a site (in any order) are linked. None when one of them is not in
+        the matrix, such as a site left out by `Graph.goodOlympics`.
+        """
+        s, o = self.station_index.get(id(v1)), self.site_index.get(id(v2))
+        if s is None or o is None:
+            s, o = self.station_index.get(id(v2)), self.site_index.get(id(v1))
+        if s is None or o is None:
+            return None
+        return self.covers(s, o)
+
+    def covered_by(self, stations):
+        """Mask of the sites covered by some station objects; unknown vertices cover nothing."""
+        covered = 0
+        for station in stations:
+            s = self.station_index.get(id(station))
+            if s is not None:
+                covered |= self.station_masks[s]
+        return covered
+
+    def is_cover(self, stations):
+        return self.covered_by(stations) == self.full
+
+    def stations_of(self, o):
+        """Positions of the stations covering site `o`, in increasing order."""
+        return self.positions(self.site_masks[o])
+
+    def sites_of(self, s):
+        return self.positions(self.station_masks[s])
+
+
+class CoverageState:
+    """
+    Sites covered by a selection of stations, updated one station at a time.
+
+    Every site keeps the number of selected stations covering it, and the uncovered sites form
+    a mask whose bit `rank[o]` stands for site `o`, sites being ranked by increasing number of
+    stations. Adding or removing a station costs its number of sites; "is everything covered"
+    is a test against zero and the uncovered site with the fewest stations is the lowest set
+    bit of the mask, O(words) on Python ints.
+    """
+
+    __slots__ = ("coverage", "counts", "uncovered", "selected")
+
+    def __init__(self, coverage, stations=()):
+        self.coverage = coverage
+        self.counts = [0] * len(coverage.sites)
+        self.uncovered = coverage.full
+        self.selected = []
+        for station in stations:
+            s = coverage.station_index.get(id(station))
+            if s is not None:
+                self.add(s)
+
+    def add(self, s):
+        """Select the station of row `s`."""
+        counts, rank = self.counts, self.coverage.rank
+        for o in self.coverage.station_sites[s]:
+            counts[o] += 1
+            if counts[o] == 1:
+                self.uncovered ^= 1 << rank[o]
+        self.selected.append(s)
+
+    def remove(self, s):
+        """Unselect the station of row `s`, the last one added being the cheapest to find."""
+        counts, rank = self.counts, self.coverage.rank
+        for o in self.coverage.station_sites[s]:
+            counts[o] -= 1
+            if counts[o] == 0:
+                self.uncovered ^= 1 << rank[o]
+        if self.selected[-1] == s:
+            self.selected.pop()
+        else:
+            self.selected.remove(s)
+
+    def all_covered(self):
+        return self.uncovered == 0
+
+    def completed_by(self, s):
+        """Whether adding the station of row `s` would cover every site, without adding it."""
+        return self.uncovered & ~self.coverage.rank_masks[s] == 0
+
+    def least_covered(self):
+        """The uncovered site with the fewest stations, None when every site is covered."""
+        if self.uncovered == 0:
+            return None
+        return self.coverage.order[(self.uncovered & -self.uncovered).bit_length() - 1]
+
+
+def _positions(values):
+    """Integer array in the smallest dtype that holds the values."""
+    values = np.asarray(values, dtype=np.int64)
+    return values.astype(np.min_scalar_type(int(values.max())) if len(values) else np.uint8)
+
+
+def _interned(values):
+    """Return the distinct values and the position of every value among them."""
+    distinct = {}
+    positions = _positions([distinct.setdefault(v, len(distinct)) for v in values])
+    return list(distinct), positions
+
+
+def _selection(positions):
+    """Pickle positions as a (start, stop) range when they are consecutive, the usual case."""
+    positions = np.asarray(positions, dtype=np.int64)
+    if len(positions) == 0 or np.array_equal(positions, np.arange(positions[0], positions[0] + len(positions))):
+        start = int(positions[0]) if len(positions) else 0
+        return (start, start + len(positions))
+    return _positions(positions)
+
+
+def _selected(selection):
+    if isinstance(selection, tuple):
+        return range(*selection)
+    return selection.tolist()
+
+
+def pack_graph(graph):
+    """
+    State of a graph for pickling, as columns: one array per vertex attribute (repeated names
+    and colors are stored once), and the edges as vertex positions and weights.
+
+    Pickling the vertices and edges one object at a time costs an order of magnitude more.
+    """
+    vertices = graph.vertices
+    position = {id(v): i for i, v in enumerate(vertices)}
+    state = {k: v for k, v in graph.__dict__.items() if k not in TRANSIENT}
+    for name in VERTEX_LISTS:
+        if name in state:
+            state[name] = _selection([position[id(v)] for v in state[name]])
+
+    is_station = [isinstance(v, Station) for v in vertices]
+    names, name_index = _interned(v.name for v in vertices)
+    colors, color_index = _interned(v.color for v in vertices)
+    stations = [v for v in vertices if isinstance(v, Station)]
+    profiles = bitarray()
+    for s in stations:
+        profiles += s.profile
+    state["vertex_columns"] = {
+        "is_station": np.array(is_station, dtype=bool),
+        "latitude": np.array([v.geopoint.latitude for v in vertices], dtype=float),
+        "longitude": np.array([v.geopoint.longitude for v in vertices], dtype=float),
+        "names": names,
+        "name_index": name_index,
+        "colors": colors,
+        "color_index": color_index,
+        "line_index": [s.line_index for s in stations],
+        "station_id": [s.station_id for s in stations],
+        "lines": [s.lines for s in stations],
+        "solution": np.array([s.solution for s in stations], dtype=bool),
+        "profiles": profiles,
+        "profile_length": _positions([len(s.profile) for s in stations]),
+    }
+
+    edges = graph.edges
+    edge_position = {id(e): i for i, e in enumerate(edges)}
+    state["edges"] = {
+        "vertex1": _positions([position[id(e.vertex1)] for e in edges]),
+        "vertex2": _positions([position[id(e.vertex2)] for e in edges]),
+        "weight": np.array([e.weight for e in edges], dtype=float),
+    }
+    extra = [e for e in graph.cached_edges if id(e) not in edge_position]
+    state["cached_edges"] = {
+        "edges": _selection([edge_position[id(e)] for e in graph.cached_edges if id(e) in edge_position]),
+        "extra": [(position[id(e.vertex1)], position[id(e.vertex2)], e.weight) for e in extra],
+    }
+    return state
+
+
+def unpack_graph(graph, state):
+    """Rebuild the vertices, edges and adjacencies of a graph pickled by `pack_graph`."""
+    columns = state.pop("vertex_columns")
+    edge_columns = state.pop("edges")
+    cached = state.pop("cached_edges")
+
+    vertices = []
+    s = 0
+    profile_start = 0
+    for i, station in enumerate(columns["is_station"].tolist()):
+        geopoint = Geopoint(float(columns["latitude"][i]), float(columns["longitude"][i]))
+        name = columns["names"][columns["name_index"][i]]
+        color = columns["colors"][columns["color_index"][i]]
+        if station:
+            v = Station(geopoint, name, columns["line_index"][s], color=color, station_id=columns["station_id"][s],
+                        lines=columns["lines"][s] if "lines" in columns else None)
+            v.solution = bool(columns["solution"][s])
+            length = int(columns["profile_length"][s])
+            v.profile = columns["profiles"][profile_start:profile_start + length]
+            profile_start += length
+            s += 1
+        else:
+            v = Olympic(geopoint, name, color=color)
+        vertices.append(v)
+
+    for name in VERTEX_LISTS:
+        if name in state:
+            state[name] = [vertices[i] for i in _selected(state[name])]
+    graph.__dict__.update(state)
+
+    def edge(i, j, weight):
+        v1, v2 = vertices[i], vertices[j]
+        v1.addadja(v2)
+        v2.addadja(v1)
+        return Edge(v1, v2, weight)
+
+    graph.edges = [edge(i, j, w) for i, j, w in zip(edge_columns["vertex1"].tolist(), edge_columns["vertex2"].tolist(),
+                                                    edge_columns["weight"].tolist())]
+    graph.cached_edges = [graph.edges[k] for k in _selected(cached["edges"])] + [edge(*e) for e in cached["extra"]]
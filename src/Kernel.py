@@ -0,0 +1,111 @@
+from .GraphCore import GraphCore, CoverageMatrix
+
+
+class Kernel:
+    """
+    Reduced instance of the station/site covering problem, shared by the solvers.
+
+    Three rules are applied until none of them changes anything:
+        - a site reached by a single station forces that station into every solution, the
+          sites it covers are then satisfied and leave the instance;
+        - a station covering a subset of the sites of another station is never needed (among
+          stations covering the same sites, the last one is kept);
+        - a site reached by a superset of the stations of another site is covered by any
+          cover of that other site, so it leaves the instance.
+    Every minimum solution of the kernel plus the forced stations is a minimum solution of
+    the whole instance.
+
+    Attributes:
+        core (GraphCore): Edges between the remaining stations and sites.
+        coverage (CoverageMatrix): Coverage of the remaining stations over the remaining sites.
+        forced (list): Stations belonging to every solution.
+        station_rows (list): Row of every remaining station in the original coverage matrix.
+        site_rows (list): Row of every remaining site in the original coverage matrix.
+        feasible (bool): False when some site has no station at all; nothing is reduced then.
+    """
+
+    __slots__ = ("core", "coverage", "forced", "station_rows", "site_rows", "feasible")
+
+    def __init__(self, core, coverage, forced, station_rows, site_rows, feasible=True):
+        self.core = core
+        self.coverage = coverage
+        self.forced = forced
+        self.station_rows = station_rows
+        self.site_rows = site_rows
+        self.feasible = feasible
+
+    @classmethod
+    def reduce(cls, core, coverage):
+        """
+        Kernel of the instance given by a `GraphCore` and its `CoverageMatrix`.
+
+        Every rule works on the bit masks of the matrix: the stations that cover every site of
+        station `s` are the AND of the station masks of its sites, and the sites reached by every
+        station of site `o` are the AND of the site masks of its stations, so one pass costs the
+        number of edges instead of a comparison of every pair.
+        """
+        station_masks, site_masks = coverage.station_masks, coverage.site_masks
+        stations = (1 << len(coverage.stations)) - 1
+        sites = coverage.full
+        forced = []
+
+        if any(site_masks[o] == 0 for o in range(len(coverage.sites))):
+            return cls(core, coverage, [], list(range(len(coverage.stations))), list(range(len(coverage.sites))), False)
+
+        changed = True
+        while changed:
+            changed = False
+
+            # sites with a single station left
+            for o in CoverageMatrix.positions(sites):
+                if not sites >> o & 1:
+                    continue
+                candidates = site_masks[o] & stations
+                if candidates and candidates & (candidates - 1) == 0:
+                    s = candidates.bit_length() - 1
+                    forced.append(s)
+                    stations &= ~(1 << s)
+                    sites &= ~station_masks[s]
+                    changed = True
+
+            # stations covering a subset of the sites of another station, or no site at all
+            for s in CoverageMatrix.positions(stations):
+                dominating = stations
+                for o in CoverageMatrix.positions(station_masks[s] & sites):
+                    dominating &= site_masks[o]
+                if dominating & ~(1 << s) or station_masks[s] & sites == 0:
+                    stations &= ~(1 << s)
+                    changed = True
+
+            # sites reached by a superset of the stations of another site
+            for o in CoverageMatrix.positions(sites):
+                if not sites >> o & 1:
+                    continue
+                dominated = sites
+                for s in CoverageMatrix.positions(site_masks[o] & stations):
+                    dominated &= station_masks[s]
+                dominated &= ~(1 << o)
+                if dominated:
+                    sites &= ~dominated
+                    changed = True
+
+        station_rows = CoverageMatrix.positions(stations)
+        site_rows = CoverageMatrix.positions(sites)
+        station_position = {s: i for i, s in enumerate(station_rows)}
+        site_position = {o: i for i, o in enumerate(site_rows)}
+        triples = [(station_position[s], site_position[o], w) for s, o, w in core.triples()
+                   if s in station_position and o in site_position]
+        reduced = GraphCore(len(station_rows), len(site_rows),
+                            [t[0] for t in triples], [t[1] for t in triples], [t[2] for t in triples])
+        kernel_stations = [coverage.stations[s] for s in station_rows]
+        kernel_sites = [coverage.sites[o] for o in site_rows]
+        return cls(reduced, reduced.coverage_matrix(kernel_stations, kernel_sites),
+                   [coverage.stations[s] for s in forced], station_rows, site_rows)
+
+    def solution(self, selected):
+        """Solution of the whole instance from the stations selected in the kernel."""
+        return list(self.forced) + [s for s in selected if s not in self.forced]
+
+    def __str__(self):
+        return (f"Kernel: {len(self.forced)} forced stations, {len(self.station_rows)} stations "
+                f"and {len(self.site_rows)} sites left")
@@ -2,5 +2,7 @@ from .Geopoint import Geopoint
 from .Site import Site
 
 class Olympic(Site):
+    __slots__ = ()
+
     def __init__(self, geopoint: Geopoint, name, color='blue') -> None:
         super().__init__(geopoint, name, color)
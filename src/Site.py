@@ -3,6 +3,8 @@ from .Vertex import Vertex
 
 
 class Site(Vertex):
+    __slots__ = ("geopoint", "name")
+
     def __init__(self, geopoint : 'Geopoint', name, color) -> None:
         super().__init__(color)
         self.geopoint = geopoint
@@ -1,19 +1,27 @@
 from .Geopoint import Geopoint
 from .Site import Site
-from bitarray import bitarray
 from bitarray.util import zeros
 
 
 
 class Station(Site):
-    def __init__(self, geopoint: Geopoint, name, line_index, accessible : bool = False, color='gray') -> None:
+    __slots__ = ("line_index", "station_id", "solution", "profile", "lines")
+
+    def __init__(self, geopoint: Geopoint, name, line_index, accessible : bool = False, color='gray', station_id=None, lines=None) -> None:
         #if(accessible):color='green'
         super().__init__(geopoint, name, color)
         self.line_index = line_index
+        self.station_id = station_id  # id_gares of the dataset
+        self.lines = lines  # lines served, when several dataset rows were merged into this stop
         self.solution = False
         self.profile = zeros(1)
         
     
+    def __setstate__(self, state):
+        self.station_id = None  # stations pickled before they carried their id_gares
+        self.lines = None
+        super().__setstate__(state)
+
     def __str__(self):
         return f"{super().__str__()}, Line Index: {self.line_index}"
     
@@ -26,9 +34,8 @@ class Station(Site):
         return self.solution
     
     def getprofile(self):
-        copy_profile = bitarray.copy(self.profile)
-        
-        return copy_profile
+        # the profile itself, not a copy: copy it before changing it for another purpose
+        return self.profile
     
     def setprofile(self, goodprofile):
         self.profile = goodprofile
@@ -1,7 +1,21 @@
+# Shared by every vertex without neighbours, most stations of a large dataset: the set of
+# neighbours is only allocated with the first one
+NO_NEIGHBOURS = frozenset()
+
+
 class Vertex:
+    __slots__ = ("color", "adja")
+
     def __init__(self, color="gray") -> None:
         self.color = color
-        self.adja = set()
+        self.adja = NO_NEIGHBOURS
+
+    def __setstate__(self, state):
+        # objects pickled before __slots__ carry their attributes in a dictionary
+        if isinstance(state, tuple):
+            state = dict(state[0] or {}, **state[1])
+        for name, value in state.items():
+            setattr(self, name, value)
 
     def get_position(self):
         pass
@@ -17,8 +31,17 @@ class Vertex:
         return adjalist
     
     def addadja(self, neighbour ):
+        if self.adja is NO_NEIGHBOURS:
+            self.adja = set()
         self.adja.add(neighbour)
     
+    def removeadja(self, neighbour):
+        if self.adja:
+            self.adja.discard(neighbour)
+
+    def clearadja(self):
+        self.adja = NO_NEIGHBOURS
+
     def isadja(self, potential_neighbour):
         
         if self.getadja().__contains__(potential_neighbour):
@@ -0,0 +1,116 @@
+import math
+import numpy as np
+
+EARTH_RADIUS = 6371000  # meters
+METERS_PER_DEGREE = EARTH_RADIUS * math.pi / 180
+
+
+def point_coordinates(points):
+    """Return the latitude and longitude arrays of a list of stations or sites."""
+    latitudes = np.fromiter((p.geopoint.latitude for p in points), dtype=float, count=len(points))
+    longitudes = np.fromiter((p.geopoint.longitude for p in points), dtype=float, count=len(points))
+    return latitudes, longitudes
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """Vectorized Haversine distance in meters, arguments in degrees (scalars or arrays)."""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GridIndex:
+    """
+    Uniform latitude/longitude grid over a set of points, with cells at least `radius` meters wide.
+
+    Every point within `radius` of a query lies in the 3x3 block of cells around it, so a query
+    only measures the points of those cells instead of the whole dataset.
+    """
+
+    def __init__(self, latitudes, longitudes, radius):
+        self.latitudes = np.asarray(latitudes, dtype=float)
+        self.longitudes = np.asarray(longitudes, dtype=float)
+        self.radius = radius
+
+        # Longitude cells are sized for the highest latitude so they stay wide enough everywhere
+        highest = float(np.abs(self.latitudes).max()) if len(self.latitudes) else 0.0
+        self.cell_lat = max(radius, 1.0) / METERS_PER_DEGREE
+        self.cell_lng = self.cell_lat / max(math.cos(math.radians(min(highest + self.cell_lat, 89.0))), 1e-6)
+
+        rows = np.floor(self.latitudes / self.cell_lat).astype(np.int64)
+        cols = np.floor(self.longitudes / self.cell_lng).astype(np.int64)
+        order = np.lexsort((cols, rows))
+        self.cells = {}
+        if len(order):
+            keys = np.stack((rows[order], cols[order]), axis=1)
+            starts = np.flatnonzero(np.any(keys[1:] != keys[:-1], axis=1)) + 1
+            for chunk in np.split(order, starts):
+                self.cells[(int(rows[chunk[0]]), int(cols[chunk[0]]))] = chunk
+
+    def query(self, latitude, longitude):
+        """
+        Return the indices of the points within `radius` of (latitude, longitude) and their distances.
+        """
+        row = math.floor(latitude / self.cell_lat)
+        col = math.floor(longitude / self.cell_lng)
+        chunks = [self.cells[(r, c)] for r in (row - 1, row, row + 1) for c in (col - 1, col, col + 1)
+                  if (r, c) in self.cells]
+        if not chunks:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=float)
+        near = np.sort(np.concatenate(chunks))
+        distances = haversine(latitude, longitude, self.latitudes[near], self.longitudes[near])
+        keep = distances <= self.radius
+        return near[keep], distances[keep]
+
+
+class CandidatePairs:
+    """
+    Compact list of the (station, site) pairs within straight-line reach, grouped by site.
+
+    The stations of site `i` are `station[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, offsets, station, distance):
+        self.offsets = offsets
+        self.station = station
+        self.distance = distance
+
+    def __len__(self):
+        return len(self.station)
+
+    def site_pairs(self, i):
+        """Return the station indices and straight-line distances of site `i`."""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.station[start:end], self.distance[start:end]
+
+
+def candidate_pairs(stations, sites, radius):
+    """
+    Find the stations within straight-line `radius` meters of every site.
+
+    Parameters:
+        stations (list): List of stations.
+        sites (list): List of Olympic sites.
+        radius (float): Search radius in meters.
+
+    Returns:
+        CandidatePairs: The pairs, grouped by site index.
+    """
+    station_lat, station_lng = point_coordinates(stations)
+    site_lat, site_lng = point_coordinates(sites)
+    return candidate_pairs_from_arrays(station_lat, station_lng, site_lat, site_lng, radius)
+
+
+def candidate_pairs_from_arrays(station_lat, station_lng, site_lat, site_lng, radius):
+    index = GridIndex(station_lat, station_lng, radius)
+    offsets = np.zeros(len(site_lat) + 1, dtype=np.int64)
+    stations, distances = [], []
+    for i, (lat, lng) in enumerate(zip(np.asarray(site_lat).tolist(), np.asarray(site_lng).tolist())):
+        near, distance = index.query(lat, lng)
+        stations.append(near)
+        distances.append(distance)
+        offsets[i + 1] = offsets[i] + len(near)
+
+    station = np.concatenate(stations).astype(np.int32) if stations else np.empty(0, dtype=np.int32)
+    distance = np.concatenate(distances) if distances else np.empty(0, dtype=float)
+    return CandidatePairs(offsets, station, distance)
@@ -0,0 +1,122 @@
+from ..Edge import Edge
+from ..Station import Station
+from ..Olympic import Olympic
+from .EdgeBuilder import shared_network_distances
+
+
+def stable_keys(vertices, key):
+    """
+    Return the stable key of every vertex. Rows sharing a key (the dataset repeats a few
+    `id_gares`) are told apart by their rank among the rows with that key.
+    """
+    seen = {}
+    keys = []
+    for v in vertices:
+        k = key(v)
+        seen[k] = seen.get(k, -1) + 1
+        keys.append((k, seen[k]))
+    return keys
+
+
+def station_key(station):
+    return (station.station_id, station.line_index)
+
+
+def legacy_station_key(station):
+    # graphs saved before stations carried their id_gares
+    return (station.name, station.line_index)
+
+
+def site_key(site):
+    return site.name
+
+
+def same_place(a, b):
+    return a.geopoint.latitude == b.geopoint.latitude and a.geopoint.longitude == b.geopoint.longitude
+
+
+def merge(current, parsed, key):
+    """
+    Match freshly parsed vertices with the vertices of the graph by stable key.
+
+    Returns:
+        tuple: (vertices to keep in the parsed order, reusing the graph's objects when nothing
+        changed, the new or moved vertices among them, the graph's vertices that are gone or moved)
+    """
+    known = dict(zip(stable_keys(current, key), current))
+    merged, changed = [], []
+    for k, v in zip(stable_keys(parsed, key), parsed):
+        old = known.pop(k, None)
+        if old is not None and same_place(old, v):
+            merged.append(old)
+        else:
+            merged.append(v)
+            changed.append(v)
+            if old is not None:
+                known[("moved", k)] = old
+    return merged, changed, list(known.values())
+
+
+def apply_delta(graph, stations, olympics, max_distance, provider, meters_per_minute=75):
+    """
+    Bring a graph up to date with re-parsed datasets without rebuilding it.
+
+    Stations are matched by `id_gares` (and line), Olympic sites by name. Only the pairs
+    involving an added or moved station or site go through the walk network stage; the edges
+    of removed or moved vertices are dropped from the adjacency, `edges` and `cached_edges`.
+    The other edges and vertex objects are kept as they are.
+
+    Parameters:
+        graph (Graph): Graph built from the previous datasets, updated in place.
+        stations (list): Stations of the new dataset.
+        olympics (list): Olympic sites of the new dataset.
+        max_distance (float): Walking threshold of the graph, in meters.
+        provider (NetworkProvider): Where the walk networks come from.
+        meters_per_minute (float): Walking speed used for the edge weights.
+
+    Returns:
+        dict: Number of added/moved stations and sites, of stale vertices and of new edges.
+    """
+    current_stations = [v for v in graph.vertices if isinstance(v, Station)]
+    current_olympics = [v for v in graph.vertices if isinstance(v, Olympic)]
+    key = station_key if all(s.station_id is not None for s in current_stations) else legacy_station_key
+    stations, changed_stations, stale_stations = merge(current_stations, stations, key)
+    olympics, changed_olympics, stale_olympics = merge(current_olympics, olympics, site_key)
+
+    stale = set(stale_stations) | set(stale_olympics)
+    for v in stale:
+        for neighbour in list(v.getadja()):
+            neighbour.removeadja(v)
+        v.clearadja()
+    graph.edges = [e for e in graph.edges if e.vertex1 not in stale and e.vertex2 not in stale]
+    graph.cached_edges = [e for e in graph.cached_edges if e.vertex1 not in stale and e.vertex2 not in stale]
+
+    graph.stations = stations
+    graph.olympics = olympics
+    graph.vertices = stations + olympics
+    graph.core = None
+
+    # new or moved sites against every station, the other sites against new or moved stations only
+    changed = set(changed_olympics)
+    unchanged_olympics = [o for o in olympics if o not in changed]
+    links = []
+    if changed_olympics:
+        links += [(stations[s], changed_olympics[o], d)
+                  for s, o, d in shared_network_distances(stations, changed_olympics, max_distance, provider)]
+    if changed_stations and unchanged_olympics:
+        links += [(changed_stations[s], unchanged_olympics[o], d)
+                  for s, o, d in shared_network_distances(changed_stations, unchanged_olympics, max_distance, provider)]
+
+    for station, olymp, distance in links:
+        edge = Edge(station, olymp, distance / meters_per_minute)
+        graph.edges.append(edge)
+        graph.cached_edges.append(edge)
+        station.addadja(olymp)
+        olymp.addadja(station)
+
+    return {
+        "stations": len(changed_stations),
+        "olympics": len(changed_olympics),
+        "stale": len(stale),
+        "edges": len(links),
+    }
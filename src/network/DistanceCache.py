@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+
+from .DistanceTable import DistanceTable
+
+# Default directory of the distance cache. It must differ from the OSMnx cache folder
+# (`./cache` by default), which utils.clear_osmnx_cache deletes at the end of every run.
+DEFAULT_DIRECTORY = "distance_cache"
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def distance_cache_key(dataset_files, provider, meters_per_second, max_distance, variant=None):
+    """
+    Hash of everything the walking distances depend on: the content of the input datasets,
+    the walk network source, the walking speed and the distance they are computed up to.
+    `variant` names any other way the datasets were read, such as a station consolidation.
+    """
+    parts = {
+        "datasets": [file_digest(path) for path in dataset_files],
+        "network": provider.fingerprint(),
+        "meters_per_second": meters_per_second,
+        "max_distance": max_distance,
+    }
+    if variant is not None:
+        parts["variant"] = variant
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class DistanceCache:
+    """
+    Directory of distance tables, one memory-mappable file per cache key.
+
+    A changed dataset or network source gives another key, so a stale table is never reused,
+    and a table stays valid whatever walking time is asked for below its `max_distance`.
+    Files are replaced atomically and only read through read-only memory maps, so any number
+    of processes can load them concurrently.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY):
+        self.directory = directory
+
+    def path(self, key):
+        return os.path.join(self.directory, f"distances-{key[:24]}.bin")
+
+    def load(self, key):
+        """Return the table stored for `key`, or None when there is none (or an outdated one)."""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            table = DistanceTable.load(path)
+        except ValueError as e:
+            print(f"Ignoring distance cache {path}: {e}")
+            return None
+        if table.meta.get("key") != key:
+            return None
+        return table
+
+    def save(self, key, table):
+        os.makedirs(self.directory, exist_ok=True)
+        table.save(self.path(key), {"key": key})
+        return self.path(key)
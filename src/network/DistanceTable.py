@@ -0,0 +1,94 @@
+import numpy as np
+
+from ..Station import Station
+from ..Olympic import Olympic
+from .EdgeBuilder import shared_network_distances
+from .Oracle import oracle_distances
+from ..storage.ArrayFile import ArrayFile, write_arrays
+
+MAGIC = b"MDSSDIST"
+VERSION = 1
+
+
+class DistanceTable:
+    """
+    Exact walking distances (meters) of every station/site pair within `max_distance`.
+
+    Stations and sites are referred to by their position in the parsed datasets. A graph for
+    any walking threshold up to `max_distance` is a plain filter over the table.
+    """
+
+    def __init__(self, station, site, distance, max_distance):
+        self.station = np.asarray(station, dtype=np.int32)
+        self.site = np.asarray(site, dtype=np.int32)
+        self.distance = np.asarray(distance, dtype=float)
+        self.max_distance = float(max_distance)
+        self.meta = {}
+
+    def __len__(self):
+        return len(self.distance)
+
+    @classmethod
+    def from_links(cls, links, max_distance):
+        """Build the table from (station index, site index, distance) triples."""
+        links = sorted(links)
+        return cls([l[0] for l in links], [l[1] for l in links], [l[2] for l in links], max_distance)
+
+    @classmethod
+    def build(cls, stations, sites, max_distance, provider):
+        """Run the walk network stage once for `max_distance`."""
+        return cls.from_links(shared_network_distances(stations, sites, max_distance, provider), max_distance)
+
+    @classmethod
+    def from_oracle(cls, oracle, stations, sites, max_distance):
+        """Answer every candidate pair with a precomputed `Oracle.LandmarkOracle`, no network is loaded."""
+        return cls.from_links(oracle_distances(oracle, stations, sites, max_distance), max_distance)
+
+    @classmethod
+    def from_graph(cls, graph, max_distance, meters_per_minute=75):
+        """
+        Recover the table from a graph built for `max_distance` whose edges carry walking
+        times in minutes, such as the pickled graphs of earlier versions.
+
+        Stations and sites are numbered by their position in `graph.getStations()` and
+        `graph.getOlympics()`, as `apply_distance_table` reads them; edges of a site that is no
+        longer listed (dropped by `goodOlympics`) are skipped.
+        """
+        stations = {id(v): i for i, v in enumerate(graph.getStations())}
+        sites = {id(v): i for i, v in enumerate(graph.getOlympics())}
+        links = set()
+        for edge in graph.edges:
+            station, site = edge.vertex1, edge.vertex2
+            if not isinstance(station, Station):
+                station, site = site, station
+            if id(station) in stations and id(site) in sites:
+                links.add((stations[id(station)], sites[id(site)], edge.weight * meters_per_minute))
+        return cls.from_links(links, max_distance)
+
+    def within(self, max_distance):
+        """
+        Return the (station index, site index, distance) triples within `max_distance`.
+        """
+        if max_distance > self.max_distance:
+            raise ValueError(f"Distances were computed up to {self.max_distance} meters, not {max_distance}")
+        keep = self.distance <= max_distance
+        return zip(self.station[keep].tolist(), self.site[keep].tolist(), self.distance[keep].tolist())
+
+    def save(self, filename, meta=None):
+        """
+        Write the table to a memory-mappable binary file (see `storage.ArrayFile.write_arrays`).
+        """
+        meta = dict(meta or {}, max_distance=self.max_distance)
+        write_arrays(filename, MAGIC, VERSION,
+                     {"station": self.station, "site": self.site, "distance": self.distance}, meta)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Memory-map a table written by `save`, read-only: loading costs only the header, and
+        processes loading the same file share its pages.
+        """
+        data = ArrayFile(filename, MAGIC, VERSION)
+        table = cls(data["station"], data["site"], data["distance"], data.meta["max_distance"])
+        table.meta = data.meta
+        return table
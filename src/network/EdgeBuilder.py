@@ -0,0 +1,92 @@
+import numpy as np
+from tqdm import tqdm
+
+from .WalkNetwork import shared_walk_networks
+from .Snapping import SnapTable
+from .Candidates import candidate_pairs
+from .WalkGraph import WalkGraph
+
+
+def network_tasks(network, stations, sites, indices, pairs):
+    """
+    Prepare the searches of some sites on one walk network.
+
+    The network is converted to a `WalkGraph`, then the sites and their candidate stations
+    are snapped to it in one query.
+
+    Parameters:
+        network: networkx walk graph.
+        stations (list): List of stations.
+        sites (list): List of Olympic sites.
+        indices (list): Indices of the sites served by this network.
+        pairs (CandidatePairs): Stations within straight-line reach of every site.
+
+    Returns:
+        tuple: (WalkGraph, list of (site index, source node, station indices, station nodes))
+    """
+    members = np.unique(np.concatenate([pairs.site_pairs(i)[0] for i in indices] + [np.empty(0, dtype=np.int32)]))
+    walk = WalkGraph.from_networkx(network)
+    snap = SnapTable(network, [sites[i].geopoint for i in indices] + [stations[j].geopoint for j in members.tolist()]).reindex(walk)
+    offset = len(indices)
+
+    tasks = []
+    for k, i in enumerate(indices):
+        near, _ = pairs.site_pairs(i)
+        if len(near) == 0:
+            continue
+        positions = offset + np.searchsorted(members, near)
+        tasks.append((i, snap.node(k), near.tolist(), snap.nodes[positions].tolist()))
+    return walk, tasks
+
+
+def cluster_jobs(stations, sites, max_distance, provider):
+    """
+    Yield the (WalkGraph, tasks) of every cluster of overlapping sites, see `network_tasks`.
+    """
+    pairs = candidate_pairs(stations, sites, max_distance)
+    # sites without any station in reach need no network at all
+    active = [i for i in range(len(sites)) if pairs.offsets[i + 1] > pairs.offsets[i]]
+    for cluster, network in shared_walk_networks([sites[i] for i in active], max_distance, provider):
+        if len(network) == 0:
+            continue  # area not covered by the network source
+        yield network_tasks(network, stations, sites, [active[c] for c in cluster], pairs)
+
+
+def search_sites(walk, tasks, max_distance):
+    """
+    Run one search bounded by `max_distance` per task.
+
+    Returns:
+        list: (station index, site index, walking distance in meters) of the stations reached.
+    """
+    links = []
+    for site, source, near, nodes in tasks:
+        distances = walk.shortest_paths(source, max_distance, targets=nodes)
+        for station, node in zip(near, nodes):
+            if node in distances:
+                links.append((station, site, distances[node]))
+    return links
+
+
+def shared_network_distances(stations, sites, max_distance, provider):
+    """
+    Compute the walking distances between stations and Olympic sites on shared walk networks.
+
+    Candidate pairs are first restricted to the stations within straight-line reach of each
+    site. One network is then loaded per cluster of overlapping sites, the sites of the cluster
+    and their candidate stations are snapped to it at once, the network is converted to a
+    `WalkGraph` and a single search bounded by `max_distance` is run from every site.
+
+    Parameters:
+        stations (list): List of stations.
+        sites (list): List of Olympic sites.
+        max_distance (float): Maximum walking distance in meters.
+        provider (NetworkProvider): Where the walk networks come from.
+
+    Returns:
+        list: (station index, site index, walking distance in meters) for every pair within reach.
+    """
+    links = []
+    for walk, tasks in tqdm(cluster_jobs(stations, sites, max_distance, provider), desc="Processing site clusters"):
+        links += search_sites(walk, tasks, max_distance)
+    return links
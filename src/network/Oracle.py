@@ -0,0 +1,217 @@
+import hashlib
+import math
+import sys
+from heapq import heappush, heappop
+import numpy as np
+from tqdm import tqdm
+
+from .WalkGraph import WalkGraph
+from .Candidates import GridIndex, candidate_pairs
+from ..storage.ArrayFile import ArrayFile, write_arrays
+
+MAGIC = b"MDSSORCL"
+VERSION = 1
+
+# Stored instead of `inf` for the nodes a landmark cannot reach: the difference with any real
+# distance stays huge (the nodes are not connected) and two unreachable nodes give no bound.
+UNREACHABLE = 1e30
+
+# Radius of the grid used to snap points to the network, in meters
+SNAP_RADIUS = 250.0
+
+
+class LandmarkOracle:
+    """
+    Point-to-point walking distances on a walk network with landmark A* (ALT).
+
+    A few landmarks are chosen once, far apart on the network, and the distance from each of
+    them to every node is stored (`count` floats per node). By the triangle inequality,
+    |d(L, u) - d(L, t)| never exceeds d(u, t), which gives A* a lower bound pointing straight at
+    the target: a query only explores a narrow corridor around the shortest path instead of a
+    whole isochrone. Walk networks are undirected, so the table serves both directions.
+    """
+
+    def __init__(self, walk, landmarks, table):
+        self.walk = walk
+        self.landmarks = landmarks
+        self.count = len(landmarks)
+        self.table = table  # distances[node * count + landmark], flat
+        self.grid = None
+        self.path = None
+
+    @classmethod
+    def build(cls, walk, count=8):
+        """
+        Choose `count` landmarks by farthest point selection and run one full search from each.
+
+        The first landmark is the node farthest from the node closest to the network centre;
+        every next one is the node farthest from all the landmarks already chosen.
+        """
+        n = len(walk)
+        if n == 0:
+            return cls(walk, [], np.empty(0))
+        x = np.frombuffer(walk.x, dtype=float)
+        y = np.frombuffer(walk.y, dtype=float)
+        start = int(np.argmin((x - x.mean()) ** 2 + (y - y.mean()) ** 2))
+        closest = cls.distances_from(walk, start)
+        closest[closest >= UNREACHABLE] = -1.0  # landmarks go to the centre's component first
+
+        landmarks, columns = [], []
+        for _ in tqdm(range(min(count, n)), desc="Computing landmarks"):
+            landmark = int(np.argmax(closest))
+            distances = cls.distances_from(walk, landmark)
+            landmarks.append(landmark)
+            columns.append(distances)
+            closest = np.minimum(closest, distances) if len(landmarks) > 1 else distances
+        table = np.ascontiguousarray(np.stack(columns, axis=1)).ravel()
+        return cls(walk, landmarks, memoryview(table).cast("B").cast("d"))
+
+    def fingerprint(self):
+        """Identify the oracle file in distance cache keys, like `NetworkProvider.fingerprint`."""
+        digest = hashlib.sha256()
+        if self.path is not None:
+            with open(self.path, "rb") as file:
+                for chunk in iter(lambda: file.read(1 << 20), b""):
+                    digest.update(chunk)
+        return f"oracle {digest.hexdigest()}"
+
+    @staticmethod
+    def distances_from(walk, source):
+        distances = np.full(len(walk), UNREACHABLE)
+        reached = walk.shortest_paths(source)
+        distances[list(reached.keys())] = list(reached.values())
+        return distances
+
+    def bound(self, u, target):
+        """Lower bound of the walking distance between the node indices `u` and `target`."""
+        k = self.count
+        row = self.table[u * k:u * k + k]
+        goal = self.table[target * k:target * k + k]
+        return max((abs(a - b) for a, b in zip(row, goal)), default=0.0)
+
+    def distance(self, source, target, max_distance=math.inf):
+        """
+        Walking distance between two node indices, `inf` when it exceeds `max_distance`.
+
+        Parameters:
+            source (int): Index of the first node.
+            target (int): Index of the second node.
+            max_distance (float): Give up on the paths longer than this, in meters.
+
+        Returns:
+            float: Length of the shortest path, or `inf`.
+        """
+        if source == target:
+            return 0.0
+        indptr, indices, weights = self.walk.indptr, self.walk.indices, self.walk.weights
+        k = self.count
+        table = self.table
+        goal = table[target * k:target * k + k]
+
+        tentative = {source: 0.0}
+        settled = set()
+        heap = [(self.bound(source, target), 0.0, source)]
+        while heap:
+            _, d, u = heappop(heap)
+            if u == target:
+                return d
+            if u in settled:
+                continue
+            settled.add(u)
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = d + weights[e]
+                if v in settled or nd >= tentative.get(v, math.inf):
+                    continue
+                tentative[v] = nd
+                row = table[v * k:v * k + k]
+                estimate = nd + max((abs(a - b) for a, b in zip(row, goal)), default=0.0)
+                if estimate <= max_distance:
+                    heappush(heap, (estimate, nd, v))
+        return math.inf
+
+    def nearest_node(self, latitude, longitude):
+        """
+        Index of the network node closest to a point, None when no node lies within
+        `SNAP_RADIUS` (the point is outside the area the network covers).
+        """
+        if self.grid is None:
+            self.grid = GridIndex(np.frombuffer(self.walk.y, dtype=float), np.frombuffer(self.walk.x, dtype=float), SNAP_RADIUS)
+        near, distances = self.grid.query(latitude, longitude)
+        if len(near) == 0:
+            return None
+        return int(near[np.argmin(distances)])
+
+    def walking_distance(self, origin, destination, max_distance=math.inf):
+        """Walking distance in meters between two geopoints, snapped to their nearest nodes."""
+        source = self.nearest_node(origin.latitude, origin.longitude)
+        target = self.nearest_node(destination.latitude, destination.longitude)
+        if source is None or target is None:
+            return math.inf
+        return self.distance(source, target, max_distance)
+
+    def save(self, filename, meta=None):
+        """Write the network and the landmark table to a memory-mappable binary file."""
+        arrays = self.walk.arrays()
+        arrays["landmarks"] = np.asarray(self.landmarks, dtype=np.int64)
+        arrays["table"] = np.frombuffer(self.table, dtype=float)
+        write_arrays(filename, MAGIC, VERSION, arrays, dict(meta or {}, count=self.count))
+
+    @classmethod
+    def load(cls, filename):
+        """Memory-map an oracle written by `save`; nothing is computed again."""
+        data = ArrayFile(filename, MAGIC, VERSION)
+        walk = WalkGraph.from_arrays(data)
+        table = np.ascontiguousarray(data["table"], dtype=float)
+        oracle = cls(walk, data["landmarks"].tolist(), memoryview(table).cast("B").cast("d"))
+        oracle.path = filename
+        return oracle
+
+
+def oracle_distances(oracle, stations, sites, max_distance):
+    """
+    Walking distances between stations and Olympic sites answered by a `LandmarkOracle`.
+
+    Same result as `EdgeBuilder.shared_network_distances`, without loading any network: every
+    candidate pair within straight-line reach is one point-to-point query, and pairs snapping
+    to the same two nodes are only queried once.
+
+    Returns:
+        list: (station index, site index, walking distance in meters) for every pair within reach.
+    """
+    pairs = candidate_pairs(stations, sites, max_distance)
+    nodes = {}
+
+    def node(point):
+        key = (point.latitude, point.longitude)
+        if key not in nodes:
+            nodes[key] = oracle.nearest_node(*key)
+        return nodes[key]
+
+    links = []
+    for i in tqdm(range(len(sites)), desc="Querying the distance oracle"):
+        near, _ = pairs.site_pairs(i)
+        if len(near) == 0:
+            continue
+        source = node(sites[i].geopoint)
+        if source is None:
+            continue
+        known = {}
+        for station in near.tolist():
+            target = node(stations[station].geopoint)
+            if target is None:
+                continue
+            if target not in known:
+                known[target] = oracle.distance(source, target, max_distance)
+            if known[target] <= max_distance:
+                links.append((station, i, known[target]))
+    return links
+
+
+if __name__ == "__main__":
+    # python3 -m src.network.Oracle <walk network file> <oracle file> [landmarks]
+    from .Provider import FileProvider
+
+    network = FileProvider(sys.argv[1]).load()
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    LandmarkOracle.build(WalkGraph.from_networkx(network), count).save(sys.argv[2], {"source": sys.argv[1]})
@@ -0,0 +1,118 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import resource_tracker, shared_memory
+from tqdm import tqdm
+
+from .WalkGraph import WalkGraph
+from .EdgeBuilder import cluster_jobs, search_sites
+
+
+class SharedWalkGraph:
+    """
+    A `WalkGraph` copied once into a shared memory block.
+
+    Workers attach to the block by name and read the CSR arrays in place, so the network
+    is never pickled into a task.
+    """
+
+    def __init__(self, walk):
+        layout = []
+        offset = 0
+        for field in WalkGraph.FIELDS:
+            values = getattr(walk, field)
+            layout.append((field, values.typecode, offset, len(values)))
+            offset += len(values) * values.itemsize
+        self.memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for field, typecode, start, length in layout:
+            data = getattr(walk, field).tobytes()
+            self.memory.buf[start:start + len(data)] = data
+        self.spec = (self.memory.name, tuple(layout))
+
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
+
+    @staticmethod
+    def attach(spec):
+        """Rebuild, in another process, a WalkGraph viewing the shared block described by `spec`."""
+        name, layout = spec
+        memory = SharedWalkGraph.open_untracked(name)
+        arrays = {}
+        for field, typecode, start, length in layout:
+            size = length * array(typecode).itemsize
+            arrays[field] = memory.buf[start:start + size].cast(typecode)
+        return memory, WalkGraph(**arrays)
+
+    @staticmethod
+    def open_untracked(name):
+        """
+        Open an existing block without registering it to the resource tracker: the creating
+        process owns it, and a worker must not unlink it when it exits.
+        """
+        try:
+            return shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # `track` only exists since Python 3.13
+            register = resource_tracker.register
+            resource_tracker.register = lambda *args, **kwargs: None
+            try:
+                return shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+
+
+# Networks already attached by this worker process, by shared memory name
+_attached = {}
+
+
+def _search_shared(spec, tasks, max_distance):
+    if spec[0] not in _attached:
+        _attached[spec[0]] = SharedWalkGraph.attach(spec)
+    _, walk = _attached[spec[0]]
+    return search_sites(walk, tasks, max_distance)
+
+
+def parallel_searches(jobs, max_distance, workers=None):
+    """
+    Run the site searches of several (WalkGraph, tasks) jobs in a process pool.
+
+    Each network goes once into shared memory; workers receive only its name and a chunk of
+    tasks and send back compact (station index, site index, distance) triples. The next job
+    is prepared (downloaded, converted, snapped) while the pool works on the previous ones.
+
+    Parameters:
+        jobs (iterable): (WalkGraph, tasks) pairs, see `EdgeBuilder.network_tasks`.
+        max_distance (float): Maximum walking distance in meters.
+        workers (int): Number of processes, one per core by default.
+
+    Returns:
+        list: (station index, site index, walking distance in meters) of every pair within reach.
+    """
+    workers = workers or os.cpu_count() or 1
+    links = []
+    blocks = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = []
+            for walk, tasks in jobs:
+                block = SharedWalkGraph(walk)
+                blocks.append(block)
+                for start in range(workers):
+                    chunk = tasks[start::workers]
+                    if chunk:
+                        futures.append(executor.submit(_search_shared, block.spec, chunk, max_distance))
+
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Searching walk networks"):
+                links.extend(future.result())
+    finally:
+        for block in blocks:
+            block.close()
+    return links
+
+
+def parallel_network_distances(stations, sites, max_distance, provider, workers=None):
+    """
+    Parallel version of `EdgeBuilder.shared_network_distances`, same arguments and result.
+    """
+    return parallel_searches(cluster_jobs(stations, sites, max_distance, provider), max_distance, workers)
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import pickle
+import numpy as np
+import osmnx as ox
+
+from .WalkNetwork import point_box
+
+
+class NetworkProvider:
+    """
+    Source of walk networks. `network` is called like `ox.graph_from_point` and returns
+    a networkx graph whose nodes carry `x`/`y` coordinates and whose edges carry a `length`.
+    """
+
+    def network(self, center, dist):
+        raise NotImplementedError
+
+    def prepare(self, boxes):
+        """Called with every (south, west, north, east) box about to be requested, does nothing by default."""
+        pass
+
+    def fingerprint(self):
+        """Text identifying the networks this provider returns, part of the distance cache keys."""
+        return self.__class__.__name__
+
+
+class OverpassProvider(NetworkProvider):
+    """Download the walk network around a point from an Overpass API endpoint."""
+
+    def __init__(self, endpoint="https://overpass.kumi.systems/api/interpreter", timeout=180, rate_limit=True):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.rate_limit = rate_limit
+
+    def fingerprint(self):
+        return f"overpass {self.endpoint}"
+
+    def network(self, center, dist):
+        ox.settings.timeout = self.timeout
+        ox.settings.overpass_rate_limit = self.rate_limit
+        # the setting was renamed between osmnx versions
+        ox.settings.overpass_endpoint = self.endpoint
+        ox.settings.overpass_url = self.endpoint
+        return ox.graph_from_point(center, dist=dist, network_type='walk')
+
+
+class FileProvider(NetworkProvider):
+    """
+    Walk network read once from a local file and cropped in memory for every request.
+
+    Supported files:
+        .graphml            saved with `ox.save_graphml`
+        .osm / .xml         OpenStreetMap XML extract (e.g. from osmium or an Overpass dump)
+        .pkl / .pickle      pickled networkx graph
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.graph = None
+
+    def fingerprint(self):
+        digest = hashlib.sha256()
+        with open(self.path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        return f"file {digest.hexdigest()}"
+
+    def load(self):
+        if self.graph is None:
+            extension = os.path.splitext(self.path)[1].lower()
+            if extension == '.graphml':
+                self.graph = ox.load_graphml(self.path)
+            elif extension in ('.osm', '.xml'):
+                self.graph = ox.graph_from_xml(self.path, bidirectional=True)
+            elif extension in ('.pkl', '.pickle'):
+                with open(self.path, 'rb') as file:
+                    self.graph = pickle.load(file)
+            else:
+                raise ValueError(f"Unsupported walk network file: {self.path}")
+
+            self.node_ids = np.array(list(self.graph.nodes))
+            self.node_x = np.array([d['x'] for _, d in self.graph.nodes(data=True)], dtype=float)
+            self.node_y = np.array([d['y'] for _, d in self.graph.nodes(data=True)], dtype=float)
+        return self.graph
+
+    def network(self, center, dist):
+        graph = self.load()
+        south, west, north, east = point_box(center, dist)
+        inside = ((self.node_y >= south) & (self.node_y <= north) &
+                  (self.node_x >= west) & (self.node_x <= east))
+        return graph.subgraph(self.node_ids[inside].tolist()).copy()
@@ -0,0 +1,70 @@
+from ..Station import Station
+from .Snapping import SnapTable
+from .WalkGraph import WalkGraph
+
+
+def edge_ends(edge):
+    """Return the (station, site) of an edge, whatever the order of its vertices."""
+    if isinstance(edge.vertex1, Station):
+        return edge.vertex1, edge.vertex2
+    return edge.vertex2, edge.vertex1
+
+
+def attach_routes(edges, provider, meters_per_minute=75):
+    """
+    Rebuild the street route of the given edges and store it in `edge.route`.
+
+    Building the graph only keeps the walking time of every edge; routes are needed for the
+    few edges of a displayed solution only. The edges are grouped by site: one walk network
+    and one search, bounded by the longest walk of the group, give the routes to all the
+    stations of the site. Edges already holding a route are skipped.
+
+    Parameters:
+        edges (iterable): Edges to draw.
+        provider (NetworkProvider): Where the walk networks come from.
+        meters_per_minute (float): Walking speed the edge weights were computed with.
+
+    Returns:
+        int: Number of routes rebuilt. Edges whose route could not be rebuilt (network
+        unavailable, station not reached) keep `route` None and are drawn as straight lines.
+    """
+    by_site = {}
+    for edge in edges:
+        if edge.route is None:
+            station, site = edge_ends(edge)
+            by_site.setdefault(site, []).append((station, edge))
+
+    rebuilt = 0
+    for site, group in by_site.items():
+        # the search may go a little further than the walks themselves, for rounding
+        reach = max(edge.weight for _, edge in group) * meters_per_minute + 1.0
+        try:
+            network = provider.network((site.geopoint.latitude, site.geopoint.longitude), reach)
+        except Exception as error:
+            print(f"Walking routes of {site.name} unavailable: {error}")
+            continue
+        if len(network) == 0:
+            continue
+
+        walk = WalkGraph.from_networkx(network)
+        snap = SnapTable(network, [site.geopoint] + [station.geopoint for station, _ in group]).reindex(walk)
+        _, previous = walk.shortest_paths(snap.node(0), reach, targets=snap.nodes[1:].tolist(), paths=True)
+        for k, (station, edge) in enumerate(group):
+            nodes = WalkGraph.path(previous, snap.node(k + 1))
+            if not nodes:
+                continue
+            # from the station to the site, through the snapped street nodes
+            route = [(station.geopoint.latitude, station.geopoint.longitude)]
+            route += [(walk.y[n], walk.x[n]) for n in reversed(nodes)]
+            route.append((site.geopoint.latitude, site.geopoint.longitude))
+            edge.route = route
+            rebuilt += 1
+    return rebuilt
+
+
+def edge_locations(edge):
+    """Points of the line drawn for an edge: its street route when known, else a straight segment."""
+    if edge.route is not None:
+        return edge.route
+    return [(edge.vertex1.geopoint.latitude, edge.vertex1.geopoint.longitude),
+            (edge.vertex2.geopoint.latitude, edge.vertex2.geopoint.longitude)]
@@ -0,0 +1,34 @@
+import numpy as np
+import osmnx as ox
+
+
+class SnapTable:
+    """
+    Nearest network node of a list of geopoints, computed with a single vectorized
+    spatial index query on the network.
+
+    Many stations snap to the same node (one row per line at a hub), so the distinct
+    nodes are kept apart and `reindex` is done once per distinct node.
+    """
+
+    def __init__(self, network, geopoints):
+        longitudes = np.array([p.longitude for p in geopoints], dtype=float)
+        latitudes = np.array([p.latitude for p in geopoints], dtype=float)
+        if len(geopoints):
+            nodes = ox.distance.nearest_nodes(network, longitudes, latitudes)
+        else:
+            nodes = []
+        self.nodes = np.asarray(nodes)
+        self.distinct, self.inverse = np.unique(self.nodes, return_inverse=True)
+
+    def reindex(self, walk):
+        """Express the snapped nodes as indices of a `WalkGraph` instead of network node ids."""
+        self.distinct = np.array([walk.index_of(n) for n in self.distinct.tolist()], dtype=np.int64)
+        self.nodes = self.distinct[self.inverse]
+        return self
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def node(self, i):
+        return self.nodes[i].item()
@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import urllib.parse
+import urllib.request
+import networkx as nx
+
+from .Provider import NetworkProvider
+from .WalkNetwork import point_box
+from .Candidates import haversine
+
+# Ways a pedestrian can use, the same selection as the osmnx 'walk' network type
+WALK_FILTER = ('["highway"]["area"!~"yes"]["highway"!~"abandoned|bus_guideway|construction|cycleway|motor|'
+               'no|planned|platform|proposed|raceway|razed"]["foot"!~"no"]["service"!~"private"]'
+               '["sidewalk"!~"separate"]["sidewalk:both"!~"separate"]["sidewalk:left"!~"separate"]'
+               '["sidewalk:right"!~"separate"]')
+
+
+def tiles_for_box(box, tile_size):
+    """Return the (row, col) of the fixed grid tiles, `tile_size` degrees wide, covering the box (south, west, north, east)."""
+    south, west, north, east = box
+    return [(row, col)
+            for row in range(math.floor(south / tile_size), math.floor(north / tile_size) + 1)
+            for col in range(math.floor(west / tile_size), math.floor(east / tile_size) + 1)]
+
+
+def tile_box(tile, tile_size):
+    row, col = tile
+    return (row * tile_size, col * tile_size, (row + 1) * tile_size, (col + 1) * tile_size)
+
+
+class TileCache:
+    """
+    Content-addressed store of Overpass responses.
+
+    Every response is written once under the hash of its content (`objects/`), and the tile
+    request, identified by the hash of its query, points to it (`refs/`). Identical tiles, such
+    as empty ones, share one object.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "refs"), exist_ok=True)
+
+    @staticmethod
+    def key(query):
+        return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+    def ref_path(self, query):
+        return os.path.join(self.directory, "refs", self.key(query))
+
+    def has(self, query):
+        return os.path.exists(self.ref_path(query))
+
+    def get(self, query):
+        with open(self.ref_path(query), "r") as ref:
+            digest = ref.read().strip()
+        with open(os.path.join(self.directory, "objects", digest), "rb") as file:
+            return file.read()
+
+    def put(self, query, content):
+        digest = hashlib.sha256(content).hexdigest()
+        path = os.path.join(self.directory, "objects", digest)
+        if not os.path.exists(path):
+            self.write_atomic(path, content)
+        self.write_atomic(self.ref_path(query), digest.encode("ascii"))
+
+    @staticmethod
+    def write_atomic(path, content):
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(content)
+        os.replace(temporary, path)
+
+
+class TileProvider(NetworkProvider):
+    """
+    Walk networks assembled from fixed grid tiles fetched from an Overpass endpoint.
+
+    Missing tiles are downloaded concurrently (at most `concurrency` requests at a time) and
+    kept in a `TileCache`; a network whose tiles are all cached needs no network I/O at all.
+    `endpoint` may be any server answering like the Overpass API, a local stand-in included.
+    """
+
+    def __init__(self, cache_directory, endpoint="https://overpass.kumi.systems/api/interpreter",
+                 concurrency=4, tile_size=0.01, timeout=180):
+        self.cache = TileCache(cache_directory)
+        self.endpoint = endpoint
+        self.concurrency = concurrency
+        self.tile_size = tile_size
+        self.timeout = timeout
+
+    def fingerprint(self):
+        return f"tiles {self.endpoint} {self.tile_size}"
+
+    def query(self, tile):
+        south, west, north, east = tile_box(tile, self.tile_size)
+        return (f"[out:json][timeout:{self.timeout}];"
+                f"(way{WALK_FILTER}({south:.6f},{west:.6f},{north:.6f},{east:.6f});>;);out;")
+
+    def fetch(self, query):
+        data = urllib.parse.urlencode({"data": query}).encode("utf-8")
+        request = urllib.request.Request(self.endpoint, data=data)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.read()
+
+    async def prefetch_tiles(self, tiles):
+        """Download the missing tiles, at most `concurrency` at a time."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def download(query):
+            async with semaphore:
+                content = await asyncio.to_thread(self.fetch, query)
+            self.cache.put(query, content)
+
+        queries = [self.query(t) for t in set(tiles)]
+        await asyncio.gather(*(download(q) for q in queries if not self.cache.has(q)))
+
+    def prefetch(self, boxes):
+        tiles = [t for box in boxes for t in tiles_for_box(box, self.tile_size)]
+        asyncio.run(self.prefetch_tiles(tiles))
+
+    def prepare(self, boxes):
+        self.prefetch(boxes)
+
+    def assemble(self, tiles):
+        """Build the walk network of a set of cached tiles, ways cut by tile borders are joined back."""
+        graph = nx.MultiDiGraph(crs="epsg:4326")
+        ways = {}
+        for tile in set(tiles):
+            for element in json.loads(self.cache.get(self.query(tile)))["elements"]:
+                if element["type"] == "node":
+                    graph.add_node(element["id"], x=element["lon"], y=element["lat"])
+                elif element["type"] == "way":
+                    ways[element["id"]] = element["nodes"]
+
+        for nodes in ways.values():
+            for u, v in zip(nodes, nodes[1:]):
+                if u == v or u not in graph or v not in graph:
+                    continue
+                a, b = graph.nodes[u], graph.nodes[v]
+                length = float(haversine(a["y"], a["x"], b["y"], b["x"]))
+                graph.add_edge(u, v, length=length)
+                graph.add_edge(v, u, length=length)
+        return graph
+
+    def network(self, center, dist):
+        box = point_box(center, dist)
+        self.prefetch([box])
+
+        graph = self.assemble(tiles_for_box(box, self.tile_size))
+        inside = [n for n, d in graph.nodes(data=True)
+                  if box[0] <= d["y"] <= box[2] and box[1] <= d["x"] <= box[3]]
+        return graph.subgraph(inside).copy()
@@ -0,0 +1,148 @@
+import math
+from array import array
+from heapq import heappush, heappop
+import numpy as np
+
+
+def _packed(typecode, values):
+    packed = array(typecode)
+    packed.frombytes(np.ascontiguousarray(values, dtype=np.dtype(typecode)).tobytes())
+    return packed
+
+
+class WalkGraph:
+    """
+    Walk network in compressed sparse row (CSR) form.
+
+    Nodes are numbered 0..n-1. The neighbours of node `u` are
+    `indices[indptr[u]:indptr[u + 1]]`, reached through edges of length
+    `weights[indptr[u]:indptr[u + 1]]` (the shortest of any parallel edges).
+    All the tables are flat `array`s, a few bytes per node and per edge.
+    """
+
+    FIELDS = ("node_ids", "x", "y", "indptr", "indices", "weights")
+
+    def __init__(self, node_ids, x, y, indptr, indices, weights):
+        self.node_ids = node_ids
+        self.x = x
+        self.y = y
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.index = None
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    @classmethod
+    def from_networkx(cls, graph, weight="length"):
+        """Convert a networkx (multi)graph whose nodes carry `x`/`y` and whose edges carry `weight`."""
+        nodes = list(graph.nodes)
+        position = {node: i for i, node in enumerate(nodes)}
+        x = np.array([graph.nodes[n]["x"] for n in nodes], dtype=float)
+        y = np.array([graph.nodes[n]["y"] for n in nodes], dtype=float)
+
+        edges = [(position[u], position[v], w) for u, v, w in graph.edges(data=weight, default=math.inf)]
+        if not graph.is_directed():
+            edges += [(v, u, w) for u, v, w in edges]
+        sources = np.array([e[0] for e in edges], dtype=np.int64)
+        targets = np.array([e[1] for e in edges], dtype=np.int64)
+        lengths = np.array([e[2] for e in edges], dtype=float)
+
+        # keep only the shortest of the parallel edges
+        order = np.lexsort((lengths, targets, sources))
+        sources, targets, lengths = sources[order], targets[order], lengths[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+        sources, targets, lengths = sources[first], targets[first], lengths[first]
+
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(nodes)), out=indptr[1:])
+        return cls(_packed("q", np.array(nodes, dtype=np.int64)), _packed("d", x), _packed("d", y),
+                   _packed("q", indptr), _packed("q", targets), _packed("d", lengths))
+
+    def arrays(self):
+        """Return the CSR tables by name, as NumPy arrays."""
+        return {field: np.frombuffer(getattr(self, field), dtype=np.dtype(getattr(self, field).typecode))
+                for field in self.FIELDS}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Build a WalkGraph on NumPy arrays (memory maps included) without copying them; they are
+        viewed through memoryviews, whose items index as fast as `array`s.
+        """
+        typecodes = {"node_ids": "q", "x": "d", "y": "d", "indptr": "q", "indices": "q", "weights": "d"}
+        views = {}
+        for field in cls.FIELDS:
+            values = np.ascontiguousarray(arrays[field], dtype=np.dtype(typecodes[field]))
+            views[field] = memoryview(values).cast("B").cast(typecodes[field])
+        return cls(**views)
+
+    def index_of(self, node_id):
+        """Return the CSR index of a network node id."""
+        if self.index is None:
+            self.index = {node: i for i, node in enumerate(self.node_ids)}
+        return self.index[node_id]
+
+    def shortest_paths(self, source, max_distance=math.inf, targets=None, paths=False):
+        """
+        Dijkstra search from the node index `source`.
+
+        The search never goes beyond `max_distance` and, when `targets` is given, stops as soon
+        as every target is settled. Only the nodes actually reached are stored, so memory follows
+        the size of the isochrone rather than the size of the network.
+
+        Parameters:
+            source (int): Index of the source node.
+            max_distance (float): Search radius, in the unit of the weights.
+            targets (iterable): Node indices of interest, all settled nodes by default.
+            paths (bool): Also return the predecessor of every settled node.
+
+        Returns:
+            dict: {node index: distance} of the settled targets (or of every settled node),
+            followed by the {node index: predecessor index} dictionary when `paths` is True.
+        """
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+        wanted = None if targets is None else set(targets)
+        remaining = -1 if wanted is None else len(wanted)
+
+        tentative = {source: 0.0}
+        settled = {}
+        previous = {source: -1} if paths else None
+        heap = [(0.0, source)]
+        while heap and remaining:
+            d, u = heappop(heap)
+            if u in settled:
+                continue
+            settled[u] = d
+            if wanted is not None and u in wanted:
+                remaining -= 1
+
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                if v in settled:
+                    continue
+                nd = d + weights[e]
+                if nd <= max_distance and nd < tentative.get(v, math.inf):
+                    tentative[v] = nd
+                    heappush(heap, (nd, v))
+                    if paths:
+                        previous[v] = u
+
+        if wanted is not None:
+            settled = {t: settled[t] for t in wanted if t in settled}
+        if paths:
+            return settled, previous
+        return settled
+
+    @staticmethod
+    def path(previous, target):
+        """Rebuild the node indices from the source to `target` out of a predecessor dictionary."""
+        if target not in previous:
+            return []
+        nodes = []
+        while target != -1:
+            nodes.append(target)
+            target = previous[target]
+        return nodes[::-1]
@@ -0,0 +1,102 @@
+import math
+
+# Meters in one degree of latitude, precise enough to size download areas
+METERS_PER_DEGREE = 111320.0
+
+
+def padded_box(geopoint, margin):
+    """
+    Return the box (south, west, north, east) extending `margin` meters around a geopoint.
+    """
+    dlat = margin / METERS_PER_DEGREE
+    dlng = margin / (METERS_PER_DEGREE * math.cos(math.radians(geopoint.latitude)))
+    return (geopoint.latitude - dlat, geopoint.longitude - dlng,
+            geopoint.latitude + dlat, geopoint.longitude + dlng)
+
+
+def point_box(center, dist):
+    """
+    Return the box (south, west, north, east) of the square `ox.graph_from_point(center, dist)` covers.
+    """
+    lat, lng = center
+    dlat = dist / METERS_PER_DEGREE
+    dlng = dist / (METERS_PER_DEGREE * math.cos(math.radians(lat)))
+    return (lat - dlat, lng - dlng, lat + dlat, lng + dlng)
+
+
+def union_box(boxes):
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+
+def boxes_overlap(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def site_clusters(sites, margin):
+    """
+    Group the sites whose padded boxes overlap, so that each group can share one walk network.
+
+    Parameters:
+        sites (list): Olympic sites (anything with a `geopoint`).
+        margin (float): Walking threshold in meters around every site.
+
+    Returns:
+        list: One list of site indices per cluster.
+    """
+    boxes = [padded_box(s.geopoint, margin) for s in sites]
+    parent = list(range(len(sites)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(sites)):
+        for j in range(i + 1, len(sites)):
+            if boxes_overlap(boxes[i], boxes[j]):
+                parent[find(i)] = find(j)
+
+    clusters = {}
+    for i in range(len(sites)):
+        clusters.setdefault(find(i), []).append(i)
+    return list(clusters.values())
+
+
+def covering_point(box):
+    """
+    Return the (center, dist) pair for which `ox.graph_from_point` downloads an area containing `box`.
+    """
+    south, west, north, east = box
+    center = ((south + north) / 2, (west + east) / 2)
+    dist = max((north - south) / 2 * METERS_PER_DEGREE,
+               (east - west) / 2 * METERS_PER_DEGREE * math.cos(math.radians(center[0])))
+    return center, dist
+
+
+def shared_walk_networks(sites, margin, provider):
+    """
+    Yield one walk network per cluster of overlapping sites, covering the bounding box of
+    the cluster plus the walking threshold.
+
+    Sites that are close to each other (the Champ de Mars venues for example) share a single
+    download instead of fetching almost the same network once per site.
+
+    Parameters:
+        sites (list): Olympic sites.
+        margin (float): Walking threshold in meters.
+        provider (NetworkProvider): Where the networks come from.
+
+    Yields:
+        tuple: (site indices of the cluster, networkx walk graph)
+    """
+    requests = []
+    for indices in site_clusters(sites, margin):
+        box = union_box([padded_box(sites[i].geopoint, margin) for i in indices])
+        requests.append((indices, covering_point(box)))
+
+    # let the provider fetch every area at once before the networks are built one by one
+    provider.prepare([point_box(center, dist) for _, (center, dist) in requests])
+    for indices, (center, dist) in requests:
+        yield indices, provider.network(center, dist)
@@ -1,29 +1,35 @@
-import json
 import os
 from ..Olympic import Olympic
 from ..Geopoint import Geopoint
 from ..Site import Site
+from .station_table import StationTable, SITE_FIELDS, iter_json_array, snapshot_table
 
-# A parser for olympic sites
-def olympic_parser() -> list[Olympic]:
-    # Define the path to the JSON file
-    json_file_path = os.path.join(os.path.dirname(__file__), '../../data/paris-2024-sites-olympiques-et-paralympiques-franciliens.json')
-    
-    # Read the JSON file
+OLYMPIC_FILE = os.path.join(os.path.dirname(__file__), '../../data/paris-2024-sites-olympiques-et-paralympiques-franciliens.json')
+
+def read_olympic_table(json_file_path=OLYMPIC_FILE) -> StationTable:
+    """Stream the Olympic site dataset into a table of coordinates and names."""
+    table = StationTable(SITE_FIELDS)
     with open(json_file_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
+        for site in iter_json_array(file):
+            geo_point = site.get('geo_point')
+            if geo_point and site.get('nom'):
+                table.append(geo_point['lat'], geo_point['lon'], site)
+    return table
+
+# A parser for olympic sites
+def olympic_parser(json_file_path=OLYMPIC_FILE, snapshot=True) -> list[Olympic]:
+    # Read the dataset, from its binary snapshot once it has been parsed
+    if snapshot:
+        table = snapshot_table(json_file_path, SITE_FIELDS, read_olympic_table)
+    else:
+        table = read_olympic_table(json_file_path)
     
     olympic_sites = []
     
-    # Parse the JSON data
-    for site in data:
-        geo_point = site.get('geo_point')
-        name = site.get('nom')
-        
-        if geo_point and name:
-            geopoint_obj = Geopoint(lat=geo_point['lat'], long=geo_point['lon'])
-            olympic_site = Olympic(geopoint_obj, name)
-            olympic_sites.append(olympic_site)
+    # Build the sites
+    for i, name in enumerate(table.column('nom')):
+        geopoint_obj = Geopoint(lat=table.latitude[i], long=table.longitude[i])
+        olympic_site = Olympic(geopoint_obj, name)
+        olympic_sites.append(olympic_site)
     
     return olympic_sites
-
@@ -0,0 +1,85 @@
+import numpy as np
+from ..Station import Station
+from ..Geopoint import Geopoint
+from ..network.Candidates import GridIndex
+
+# Dataset fields identifying a physical stop: the stop area (zone d'arrêt) or the wider
+# interchange area (zone de correspondance) of every row
+CONSOLIDATION_KEYS = {"zda": "id_ref_zda", "zdc": "id_ref_zdc"}
+
+
+def group_rows(table, consolidate, merge_radius=0.0):
+    """
+    Group the rows of a StationTable standing for the same physical stop, in the dataset order.
+
+    Parameters:
+        table (StationTable): Parsed rows of the station dataset.
+        consolidate (str): "zda" or "zdc" to group by stop or interchange area, "coordinates"
+            to group the rows within `merge_radius` meters of each other (transitively).
+        merge_radius (float): Distance for the "coordinates" grouping, 0 for identical points.
+
+    Returns:
+        list: Lists of row indices, one per stop.
+    """
+    if consolidate in CONSOLIDATION_KEYS:
+        column = table.column(CONSOLIDATION_KEYS[consolidate])
+        groups = {}
+        for i, key in enumerate(column):
+            # rows without an area reference stay alone
+            groups.setdefault(key if key is not None else ("row", i), []).append(i)
+        return list(groups.values())
+
+    if consolidate == "coordinates":
+        latitudes = np.frombuffer(table.latitude, dtype=float)
+        longitudes = np.frombuffer(table.longitude, dtype=float)
+        parent = list(range(len(table)))
+
+        def root(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        if merge_radius > 0:
+            grid = GridIndex(latitudes, longitudes, merge_radius)
+            for i in range(len(table)):
+                for j in grid.query(latitudes[i], longitudes[i])[0].tolist():
+                    parent[root(j)] = root(i)
+        else:
+            first = {}
+            for i, point in enumerate(zip(table.latitude, table.longitude)):
+                parent[i] = first.setdefault(point, i)
+
+        groups = {}
+        for i in range(len(table)):
+            groups.setdefault(root(i), []).append(i)
+        return list(groups.values())
+
+    raise ValueError(f"Unknown station consolidation: {consolidate}")
+
+
+def consolidated_station(table, rows):
+    """
+    Merge the rows of one stop into a single candidate station.
+
+    The station stands at the mean position of the rows, keeps the `id_gares` and name of the
+    first row, and lists the lines of every row (`res_com`, e.g. "METRO 14") in `lines`; its
+    `line_index` joins their `indice_lig`.
+    """
+    first = rows[0]
+    latitude = sum(table.latitude[i] for i in rows) / len(rows)
+    longitude = sum(table.longitude[i] for i in rows) / len(rows)
+    name, station_id = table.value('nom_gares', first), table.value('id_gares', first)
+    if len(rows) == 1:
+        return Station(Geopoint(lat=latitude, long=longitude), name, table.value('indice_lig', first),
+                       station_id=station_id)
+    lines = []
+    indices = []
+    for i in rows:
+        line = table.value('res_com', i) or table.value('indice_lig', i)
+        if line not in lines:
+            lines.append(line)
+        if table.value('indice_lig', i) not in indices:
+            indices.append(table.value('indice_lig', i))
+    return Station(Geopoint(lat=latitude, long=longitude), name, "/".join(indices),
+                   station_id=station_id, lines=lines)
@@ -1,28 +1,37 @@
-import json
 import os
 from ..Station import Station
 from ..Geopoint import Geopoint
+from .station_table import load_station_table
+from .station_consolidation import group_rows, consolidated_station
+
+STATION_FILE = os.path.join(os.path.dirname(__file__), '../../data/emplacement-des-gares-idf.json')
 
 # A parser for station sites
-def station_parser() -> list[Station]:
-    # Define the path to the JSON file
-    json_file_path = os.path.join(os.path.dirname(__file__), '../../data/emplacement-des-gares-idf.json')
-    
-    # Read the JSON file
-    with open(json_file_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
-    
+def station_parser(json_file_path=STATION_FILE, consolidate=None, merge_radius=0.0, bbox=None, modes=None,
+                   snapshot=True) -> list[Station]:
+    """
+    Parse the station dataset, one Station per row.
+
+    The file is streamed row by row and only the fields used are kept (see
+    station_table.read_station_table), so memory does not grow with the unused fields
+    or with the rows left out by `bbox` (min lat, min lon, max lat, max lon) and
+    `modes` (e.g. {"METRO", "RER", "TRAMWAY"}). With `snapshot`, the table comes from the
+    binary snapshot next to the dataset once it has been parsed (storage.DatasetSnapshot).
+
+    With `consolidate` ("zda", "zdc" or "coordinates", see station_consolidation.group_rows),
+    the rows of the same physical stop (a hub appears once per line) become a single Station
+    listing the lines it serves, so the solvers have far fewer candidates.
+    """
+    table = load_station_table(json_file_path, bbox=bbox, modes=modes, snapshot=snapshot)
+
+    if consolidate:
+        return [consolidated_station(table, group) for group in group_rows(table, consolidate, merge_radius)]
+
     stations = []
-    
-    # Parse the JSON data
-    for site in data:
-        geo_point = site.get('geo_point_2d')
-        name = site.get('nom_gares')
-        line_index = site.get('indice_lig')
-        
-        if geo_point and name and line_index is not None:
-            geopoint_obj = Geopoint(lat=geo_point['lat'], long=geo_point['lon'])
-            station = Station(geopoint_obj, name, line_index)
-            stations.append(station)
-    
-    return stations
\ No newline at end of file
+    names, line_indices, ids = table.column('nom_gares'), table.column('indice_lig'), table.column('id_gares')
+    for i in range(len(table)):
+        geopoint_obj = Geopoint(lat=table.latitude[i], long=table.longitude[i])
+        station = Station(geopoint_obj, names[i], line_indices[i], station_id=ids[i])
+        stations.append(station)
+
+    return stations
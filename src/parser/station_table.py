@@ -0,0 +1,176 @@
+import json
+import re
+import sys
+from array import array
+
+from ..storage.DatasetSnapshot import snapshot_path, load_snapshot, write_snapshot
+
+# Fields of a station row kept by the parser, every other field (geo_shape, picto, ...) is dropped
+STATION_FIELDS = ("nom_gares", "indice_lig", "id_gares", "res_com", "mode", "id_ref_zda", "id_ref_zdc")
+# Fields of an Olympic site row kept by the parser
+SITE_FIELDS = ("nom",)
+
+_SEPARATORS = re.compile(r"[\s,]*")
+
+
+def iter_json_array(file, chunk_size=1 << 16):
+    """
+    Yield the elements of the JSON array of a text file one at a time.
+
+    The file is read `chunk_size` characters at a time and every element is decoded from the
+    buffer as soon as it is complete, so memory holds one chunk and one element, whatever the
+    size of the file.
+    """
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size)
+    position = _SEPARATORS.match(buffer).end()
+    if buffer[position:position + 1] != "[":
+        raise ValueError("The file does not hold a JSON array")
+    position += 1
+
+    while True:
+        position = _SEPARATORS.match(buffer, position).end()
+        if position == len(buffer):
+            more = file.read(chunk_size)
+            if not more:
+                raise ValueError("Unterminated JSON array")
+            buffer, position = more, 0
+            continue
+        if buffer[position] == "]":
+            return
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # the element goes on in the next chunk
+            more = file.read(chunk_size)
+            if not more:
+                raise
+            buffer, position = buffer[position:] + more, 0
+            continue
+        if type(element) in (int, float) and buffer[end:end + 1] in ("", ".", "e", "E"):
+            # a number cut by the end of the buffer decodes as a shorter one
+            more = file.read(chunk_size)
+            if more:
+                buffer, position = buffer[position:] + more, 0
+                continue
+        yield element
+        position = end
+        if position >= chunk_size:
+            buffer, position = buffer[position:], 0
+
+
+class StationTable:
+    """
+    Columnar table of dataset rows (stations, or Olympic sites with `SITE_FIELDS`): coordinates
+    in two float arrays, and one list per projected field (repeated texts such as names, modes
+    and line indices are interned).
+
+    Row `i` is `latitude[i]`, `longitude[i]` and `columns[field][i]` for every field.
+    """
+
+    def __init__(self, fields=STATION_FIELDS):
+        self.fields = tuple(fields)
+        self.latitude = array("d")
+        self.longitude = array("d")
+        self.columns = {field: [] for field in self.fields}
+
+    def __len__(self):
+        return len(self.latitude)
+
+    def append(self, latitude, longitude, row):
+        self.latitude.append(latitude)
+        self.longitude.append(longitude)
+        for field in self.fields:
+            value = row.get(field)
+            self.columns[field].append(sys.intern(value) if isinstance(value, str) else value)
+
+    @classmethod
+    def from_columns(cls, fields, latitude, longitude, columns):
+        table = cls(fields)
+        table.latitude = array("d", latitude)
+        table.longitude = array("d", longitude)
+        table.columns = {field: [sys.intern(v) if isinstance(v, str) else v for v in columns[field]]
+                         for field in table.fields}
+        return table
+
+    def filtered(self, bbox=None, modes=None):
+        """The rows within `bbox` and of one of `modes`, see `read_station_table`."""
+        if bbox is None and modes is None:
+            return self
+        modes = None if modes is None else set(modes)
+        mode = self.columns.get("mode")
+        table = StationTable(self.fields)
+        for i in range(len(self)):
+            if _kept(self.latitude[i], self.longitude[i], mode[i] if mode is not None else None, bbox, modes):
+                table.append(self.latitude[i], self.longitude[i], {f: self.columns[f][i] for f in self.fields})
+        return table
+
+    def column(self, field):
+        return self.columns[field]
+
+    def value(self, field, i):
+        return self.columns[field][i]
+
+
+def _kept(latitude, longitude, mode, bbox, modes):
+    if modes is not None and mode not in modes:
+        return False
+    return bbox is None or (bbox[0] <= latitude <= bbox[2] and bbox[1] <= longitude <= bbox[3])
+
+
+def read_station_table(json_file_path, bbox=None, modes=None, fields=STATION_FIELDS, chunk_size=1 << 16):
+    """
+    Stream the station dataset into a StationTable, keeping only the rows and fields needed.
+
+    Rows without coordinates, name or line index are skipped, as by `station_parser`.
+
+    Parameters:
+        json_file_path (str): Station dataset (JSON array of rows).
+        bbox (tuple): (min latitude, min longitude, max latitude, max longitude) the stations
+            must lie in, None for no limit.
+        modes (iterable): Values of the `mode` field to keep (e.g. "METRO", "RER", "TRAMWAY"),
+            None for every mode.
+        fields (tuple): Fields to keep besides the coordinates.
+        chunk_size (int): Characters read at a time.
+
+    Returns:
+        StationTable: The projected rows, in the dataset order.
+    """
+    modes = None if modes is None else set(modes)
+    table = StationTable(fields)
+    with open(json_file_path, "r", encoding="utf-8") as file:
+        for row in iter_json_array(file, chunk_size):
+            geo_point = row.get("geo_point_2d")
+            if not geo_point or not row.get("nom_gares") or row.get("indice_lig") is None:
+                continue
+            if not _kept(geo_point["lat"], geo_point["lon"], row.get("mode"), bbox, modes):
+                continue
+            table.append(geo_point["lat"], geo_point["lon"], row)
+    return table
+
+
+def snapshot_table(json_file_path, fields, parse):
+    """
+    The table `parse(json_file_path)` returns, from the binary snapshot next to the dataset
+    when it is up to date (see storage.DatasetSnapshot), else parsed and snapshotted.
+    """
+    path = snapshot_path(json_file_path)
+    columns = load_snapshot(path, json_file_path, fields)
+    if columns is not None:
+        return StationTable.from_columns(fields, *columns)
+    table = parse(json_file_path)
+    try:
+        write_snapshot(path, json_file_path, table.latitude, table.longitude, table.columns)
+    except OSError as e:
+        print(f"Dataset snapshot {path} not written: {e}")
+    return table
+
+
+def load_station_table(json_file_path, bbox=None, modes=None, snapshot=True):
+    """
+    `read_station_table` through the dataset snapshot: the whole projected table is stored
+    once, and `bbox` and `modes` filter it on every load.
+    """
+    if not snapshot:
+        return read_station_table(json_file_path, bbox=bbox, modes=modes)
+    return snapshot_table(json_file_path, STATION_FIELDS, read_station_table).filtered(bbox, modes)
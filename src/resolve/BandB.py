@@ -2,69 +2,110 @@ from src.Graph2 import Graph
 import folium
 from tqdm import tqdm
 from src.Station import Station
+from src.network.Routes import attach_routes, edge_locations
+from src.GraphCore import CoverageState
+from src.resolve.Transposition import TranspositionTable, DEFAULT_MEMORY
+from src.resolve.Greedy import Greedy
 
-def ensemble_dominant(graph: Graph, S=set(), k=None, processed=None, dominated_edges=None, best_solution=None, visited_states=None):
+def ensemble_dominant(graph: Graph, S=set(), k=None, processed=None, dominated_edges=None, best_solution=None, visited_states=None, stats=None, memory=DEFAULT_MEMORY):
     """
-    Recursive function to find the minimum dominating set with backtracking.
-    Fully explores the solution space and compares sizes to ensure minimal solution.
+    Minimum dominating set of the graph containing the stations of S, found by backtracking.
+
+    The search (`dominant_search`) explores the kernel of the graph (see Kernel.Kernel) and
+    compares sizes to keep the smallest cover, whose forced stations are added back. The
+    kernel is reduced without S, so when S is not empty the whole graph is searched instead,
+    starting from S. `best_solution` is a one-element list holding the best selection of
+    station rows so far, by default a Greedy cover joined with S. `visited_states` is the
+    TranspositionTable of the states already explored, so a set of uncovered sites reached
+    again through another order of the same stations is not explored twice, and its counters
+    are added to `stats` (a TableStats) when given; a new one holds at most `memory` bytes, 0
+    to store no state. `k`, `processed` and `dominated_edges` are not used.
     """
-    if processed is None:
-        processed = set()
-    if dominated_edges is None:
-        dominated_edges = set()
+    kernel = graph.get_kernel()
+    if not kernel.feasible:
+        return None
+    if S:
+        coverage, complete = graph.get_coverage(), list
+    else:
+        coverage, complete = kernel.coverage, kernel.solution
+    state = CoverageState(coverage, S)
     if best_solution is None:
-        best_solution = [None]
+        given = list(state.selected)
+        best_solution = [given + [s for s in Greedy(coverage).cover() if s not in given]]
     if visited_states is None:
-        visited_states = set()
+        visited_states = TranspositionTable(memory)
+    dominant_search(state, best_solution, visited_states)
+    if stats is not None:
+        stats.add(visited_states)
+    if best_solution[0] is None:
+        return None
+    return set(complete([coverage.stations[s] for s in best_solution[0]])) | set(S)
 
-    # Efficient termination: If current solution is worse than best solution, stop exploring
-    if best_solution[0] is not None and len(S) >= len(best_solution[0]):
-        return
 
-    # If this is a valid solution, compare and potentially update the best solution
-    if graph.isSolutionOfAccessibility(S):
-        if best_solution[0] is None or len(S) < len(best_solution[0]):
-            best_solution[0] = set(S)
-
-    # Identify uncovered Olympic sites
-    uncovered_sites = [o for o in graph.getOlympics() if not any(station in S for station in graph.get_neighbors(o))]
-    if not uncovered_sites:
-        # If all sites are covered, check if this solution is minimal
-        if best_solution[0] is None or len(S) < len(best_solution[0]):
-            best_solution[0] = set(S)
-        return
-
-    # Heuristic: Explore stations that cover uncovered sites (still general)
-    u = min(uncovered_sites, key=lambda v: len(graph.get_neighbors(v)))
-    processed.add(u)
-
-    # Try adding neighbors of uncovered sites to the solution
-    for v in graph.get_neighbors(u):
-        if v not in S:
-            new_solution = S | {v}
-            ensemble_dominant(graph, new_solution, k, processed, dominated_edges, best_solution, visited_states)
-
-    # Backtrack by removing `u` from the processed set
-    processed.remove(u)
-
-    return best_solution[0]
+def dominant_search(state, best_solution, visited_states):
+    """
+    Depth-first search for the smallest selection completing `state` into a cover.
+
+    Every node branches on its uncovered site with the fewest stations and tries each of them,
+    and a node is cut as soon as its selection is as large as the best one found. The search
+    keeps an explicit stack of the station iterators of the open nodes and adds and removes
+    stations on `state` in place, so it needs no Python recursion and copies no selection but
+    the best ones.
+
+    Parameters:
+        state (CoverageState): Selection to complete, given back unchanged.
+        best_solution (list): One element, the best selection (station rows) found so far or
+            None, replaced when a smaller one is found.
+        visited_states (TranspositionTable): States already explored.
+    """
+    coverage = state.coverage
+    selected = state.selected
+    site_stations = [coverage.stations_of(o) for o in range(len(coverage.sites))]
+    order = coverage.order
+    stack = []
+    added = False
+    while True:
+        # Visit the node of the current selection
+        branches = None
+        best = best_solution[0]
+        if best is None or len(selected) < len(best):
+            uncovered = state.uncovered
+            if uncovered == 0:
+                best_solution[0] = list(selected)
+            elif not visited_states.seen(uncovered, len(selected)):
+                branches = iter(site_stations[order[(uncovered & -uncovered).bit_length() - 1]])
+        if branches is not None:
+            stack.append(branches)
+        elif added:
+            state.remove(selected[-1])
+
+        # Next station to try, backtracking out of the nodes whose stations were all tried
+        while stack:
+            s = next(stack[-1], None)
+            if s is not None:
+                break
+            stack.pop()
+            if stack:
+                state.remove(selected[-1])
+        else:
+            return
+        state.add(s)
+        added = True
 
 
 
 def remove_double_dominated_stations(graph: Graph, solution: set):
-    station_dominated_edges = {}
-    for station in solution:
-        station_dominated_edges[station] = {
-            edge for edge in graph.cached_edges if (edge.vertex1 == station or edge.vertex2 == station)
-        }
-    #keep only stations that have unique coverage
-    refined_solution = set()
-    all_dominated_edges = set()
+    """
+    Drop the stations of `solution` whose sites are all covered by its other stations, one at a
+    time and the smallest first, from the cover counts of the sites (see Greedy).
+    """
+    coverage = graph.get_coverage()
+    search = Greedy(coverage)
     for station in solution:
-        if not station_dominated_edges[station].issubset(all_dominated_edges):
-            refined_solution.add(station)
-            all_dominated_edges.update(station_dominated_edges[station])
-    return refined_solution
+        search.state.add(coverage.station_index[id(station)])
+    while search.remove_redundant(search.spare()[0]):
+        pass
+    return {coverage.stations[s] for s in search.state.selected}
 
 
 
@@ -87,20 +128,22 @@ def draw_minimum_dominating_set(graph: Graph, selected_stations):
             popup=v.name,
             icon=folium.Icon(color=color)
         ).add_to(folium_map)
-    for edge in  tqdm(graph.cached_edges, desc="Drawing edges"):
-        if edge.vertex1 in selected_stations and edge.vertex2 in graph.getOlympics() or \
-           edge.vertex2 in selected_stations and edge.vertex1 in graph.getOlympics():
-            walking_time_minutes = int(edge.weight)
-            walking_time_seconds = int((edge.weight - walking_time_minutes) * 60)
-            walking_time_str = f"{walking_time_minutes} minutes {walking_time_seconds} seconds"
-
-            folium.PolyLine(
-                locations=[(edge.vertex1.geopoint.latitude, edge.vertex1.geopoint.longitude),
-                           (edge.vertex2.geopoint.latitude, edge.vertex2.geopoint.longitude)],
-                color="black",
-                weight=2,
-                opacity=1,
-                tooltip=f"Walking time: {walking_time_str}").add_to(folium_map)
+    drawn = [edge for edge in graph.cached_edges
+             if edge.vertex1 in selected_stations and edge.vertex2 in graph.getOlympics() or
+             edge.vertex2 in selected_stations and edge.vertex1 in graph.getOlympics()]
+    # Street routes are only rebuilt for the edges of the solution
+    attach_routes(drawn, graph.get_network_provider())
+    for edge in  tqdm(drawn, desc="Drawing edges"):
+        walking_time_minutes = int(edge.weight)
+        walking_time_seconds = int((edge.weight - walking_time_minutes) * 60)
+        walking_time_str = f"{walking_time_minutes} minutes {walking_time_seconds} seconds"
+
+        folium.PolyLine(
+            locations=edge_locations(edge),
+            color="black",
+            weight=2,
+            opacity=1,
+            tooltip=f"Walking time: {walking_time_str}").add_to(folium_map)
 
     folium_map.save("map.html")
     return folium_map
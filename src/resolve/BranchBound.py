@@ -0,0 +1,179 @@
+import math
+
+from ..Graph import Graph
+from ..GraphCore import CoverageMatrix
+from .Transposition import TranspositionTable, DEFAULT_MEMORY
+from .Greedy import Greedy
+
+
+class BranchBound:
+    """
+    Exact branch and bound over integer bit masks.
+
+    Sites are numbered by `CoverageMatrix.rank` (fewest stations first), so a state is the
+    mask of its uncovered sites. A node branches on the uncovered site with the fewest stations
+    still allowed, trying its stations by decreasing number of uncovered sites covered. A
+    station whose uncovered sites are all covered by a station already tried is skipped, and
+    once a station has been tried for that site the next branches exclude it, as any cover
+    holding it was already met. A node is cut when the stations selected plus a lower bound of the
+    stations still needed reach the best cover known:
+        - uncovered sites pairwise sharing no station each need their own station (the sites
+          are picked greedily, fewest stations first);
+        - the uncovered sites need at least their number divided by the largest station.
+    A node whose uncovered sites were already explored with no more stations selected and no
+    fewer allowed is cut too, when a TranspositionTable is given.
+
+    Attributes:
+        best (list): Rows of the best cover found, None until one is found.
+        optimal (bool): Whether the search ran to completion, so `best` is a minimum cover.
+        nodes (int): Number of nodes explored.
+        pruned (int): Number of nodes cut by the bound.
+        table (TranspositionTable): Explored states, None to explore every state reached.
+    """
+
+    def __init__(self, coverage, incumbent=None, upper_bound=None, table=None):
+        self.coverage = coverage
+        self.table = table
+        self.masks = coverage.rank_masks
+        self.candidates = [coverage.site_masks[o] for o in coverage.order]
+        self.conflicts = []
+        for stations in self.candidates:
+            conflict = 0
+            for s in CoverageMatrix.positions(stations):
+                conflict |= self.masks[s]
+            self.conflicts.append(conflict)
+        self.largest = max((m.bit_count() for m in self.masks), default=1) or 1
+        # covers of `best_size` stations or more are not searched for
+        self.best = list(incumbent) if incumbent is not None else None
+        self.best_size = len(self.best) if self.best is not None else math.inf
+        if upper_bound is not None:
+            self.best_size = min(self.best_size, upper_bound)
+        self.optimal = False
+        self.nodes = 0
+        self.pruned = 0
+
+    def lower_bound(self, uncovered):
+        """Stations still needed to cover the sites of the mask `uncovered`, at least."""
+        disjoint = 0
+        remaining = uncovered
+        while remaining:
+            low = remaining & -remaining
+            disjoint += 1
+            remaining &= ~self.conflicts[low.bit_length() - 1]
+        return max(disjoint, -(-uncovered.bit_count() // self.largest))
+
+    def branching_site(self, uncovered, allowed):
+        """Rank of the uncovered site with the fewest allowed stations, and those stations."""
+        best_rank, best_stations, best_count = None, 0, math.inf
+        remaining = uncovered
+        while remaining:
+            low = remaining & -remaining
+            remaining ^= low
+            r = low.bit_length() - 1
+            stations = self.candidates[r] & allowed
+            count = stations.bit_count()
+            if count < best_count:
+                best_rank, best_stations, best_count = r, stations, count
+                if count <= 1:
+                    break
+        return best_rank, best_stations
+
+    def search(self):
+        """
+        Run the search to completion; the rows of a minimum cover end in `best`.
+
+        The nodes are visited depth first from an explicit stack of frames [uncovered sites,
+        allowed stations, stations to try, next one to try], so the depth of the search does
+        not depend on the Python recursion limit.
+        """
+        selected = []
+        uncovered = self.coverage.full
+        allowed = (1 << len(self.coverage.stations)) - 1
+        stack = []
+        kept = self.expand(uncovered, allowed, selected)
+        if kept is not None:
+            stack.append([uncovered, allowed, kept, 0])
+        while stack:
+            frame = stack[-1]
+            uncovered, allowed, kept, i = frame
+            if i > 0:
+                s = selected.pop()
+                # every cover holding `s` was met in its branch
+                allowed &= ~(1 << s)
+                frame[1] = allowed
+                if len(selected) + 1 >= self.best_size:
+                    i = len(kept)
+            if i == len(kept):
+                stack.pop()
+                continue
+            mask, s = kept[i]
+            frame[3] = i + 1
+            selected.append(s)
+            child = self.expand(uncovered & ~mask, allowed, selected)
+            if child is not None:
+                stack.append([uncovered & ~mask, allowed, child, 0])
+        self.optimal = True
+        return self.best
+
+    def expand(self, uncovered, allowed, selected):
+        """
+        Visit the node of the selection `selected`, leaving sites `uncovered` and stations
+        `allowed`: record it when it is a cover, and return the stations to branch on, None
+        when the node is a leaf or is cut.
+        """
+        self.nodes += 1
+        if uncovered == 0:
+            if len(selected) < self.best_size:
+                self.best = list(selected)
+                self.best_size = len(selected)
+            return None
+        if len(selected) + self.lower_bound(uncovered) >= self.best_size:
+            self.pruned += 1
+            return None
+        if self.table is not None and self.table.seen(uncovered, len(selected), allowed):
+            return None
+
+        _, stations = self.branching_site(uncovered, allowed)
+        masks = self.masks
+        candidates = sorted(((masks[s] & uncovered, s) for s in CoverageMatrix.positions(stations)),
+                            key=lambda c: -c[0].bit_count())
+        kept = []
+        for mask, s in candidates:
+            # a station covering no uncovered site a kept one misses can be swapped for it
+            if not any(mask & ~other == 0 for other, _ in kept):
+                kept.append((mask, s))
+        return kept
+
+    @staticmethod
+    def solve(G: Graph, incumbent=None, memory=DEFAULT_MEMORY, stats=None):
+        """
+        Minimum set of stations covering every site of G, False when some site has no station.
+
+        The search runs on the kernel of G (see Kernel.Kernel), whose forced stations are added
+        back. The first upper bound is a Greedy cover of the kernel, or `incumbent`, a known cover
+        of G, when it is smaller. `memory` caps the transposition table in bytes, 0 disables it;
+        its counters are added to `stats` (a TableStats) when given.
+        """
+        kernel = G.get_kernel()
+        if not kernel.feasible:
+            print("No solution found")
+            return False
+        coverage = kernel.coverage
+
+        best = Greedy(coverage).cover()
+        upper_bound = None
+        if incumbent is not None:
+            rows = [coverage.station_index[id(s)] for s in incumbent if id(s) in coverage.station_index]
+            if coverage.is_cover([coverage.stations[s] for s in rows]):
+                if len(rows) < len(best):
+                    best = rows
+            else:
+                # a cover of G of k stations bounds the kernel by k minus the forced stations
+                upper_bound = len(incumbent) - len(kernel.forced) + 1
+        table = TranspositionTable(memory) if memory > 0 else None
+        engine = BranchBound(coverage, best, upper_bound, table)
+        best = engine.search()
+        print(f"Branch and bound: {engine.nodes} nodes, {engine.pruned} cut by the bound")
+        if table is not None and stats is not None:
+            stats.add(table)
+        return kernel.solution([coverage.stations[s] for s in best])
@@ -1,4 +1,3 @@
-import itertools
 from tqdm import tqdm
 
 
@@ -9,13 +8,14 @@ from tqdm import tqdm
 from ..Graph import Graph
 from ..Station import Station
 from ..Olympic import Olympic
+from ..GraphCore import CoverageState
+from .Greedy import Greedy
 
 class BruteForce:
 
     @staticmethod
     def solve(G:Graph):
 
-        stations = G.getStations()
         olympics = G.getOlympics()
 
         #First it is easy to check if no solution exists
@@ -24,29 +24,61 @@ class BruteForce:
                 print("No solution found")
                 return False
 
+        #The search runs on the kernel of G (see Kernel.Kernel): its forced stations belong to
+        #every solution and the stations and sites it removed never change the minimum
+        kernel = G.get_kernel()
+        coverage = kernel.coverage
+        stations = list(coverage.stations)
+
         #Main loop over the number of vertices we try to include in the solution
         #Basically we will try every 1 sized solutions, 2 sized_solution ... 
-        #until G.nOlympic sized solutions
-        #We don't try until G.nStations sized solutions because we know that if we can't find a
-        #solution with G.nOlympic vertices, we won't be able to find one with G.nStations vertices
-        #complexity is 0(2^G.nOlympic) (verification of each certificate)
-        for i in tqdm(range(len(G.vertices)-len(stations)), desc="Brute force computation"):
-            r = BruteForce.solve_for_i_stations(stations, len(stations), i, G)
-            if(r):
-                return r
-            
-        print("No solution found")
-        return False
+        #until nOlympic sized solutions (of the kernel)
+        #We don't try until nStations sized solutions because we know that if we can't find a
+        #solution with nOlympic vertices, we won't be able to find one with nStations vertices
+        #complexity is 0(2^nOlympic) (verification of each certificate)
+        #A greedy cover (see Greedy) bounds the search: only the sizes below it are tried, and
+        #it is the solution when none of them works
+        if not kernel.feasible:
+            print("No solution found")
+            return False
+        greedy = [stations[s] for s in Greedy(coverage).cover()]
+        for i in tqdm(range(min(len(coverage.sites) + 1, len(greedy))), desc="Brute force computation"):
+            r = BruteForce.solve_for_i_stations(stations, len(stations), i, G, coverage)
+            if r is not False:
+                return kernel.solution(r)
+
+        return kernel.solution(greedy)
 
     @staticmethod
-    def solve_for_i_stations(stations, n, i, G):
-        #every possible sublist of i elements
-        combinations = itertools.combinations(range(n),i)
+    def solve_for_i_stations(stations, n, i, G, coverage=None):
+        #every possible sublist of i elements, in the order of itertools.combinations(range(n), i)
+        #consecutive sublists share their prefix, so the coverage is updated one station at a time
+        if coverage is None:
+            coverage = G.get_coverage()
+        rows = [coverage.station_index[id(s)] for s in stations]
+        state = CoverageState(coverage)
+        combo = []
 
-        for combo in combinations:
-            certificate = [stations[k] for k in combo]
+        def extend(start):
+            if i == 0:
+                return state.all_covered()
+            if len(combo) == i - 1:
+                #last station of the sublist: a mask test, nothing to update
+                for k in range(start, n):
+                    if state.completed_by(rows[k]):
+                        combo.append(k)
+                        return True
+                return False
+            for k in range(start, n - (i - len(combo)) + 1):
+                state.add(rows[k])
+                combo.append(k)
+                if extend(k + 1):
+                    return True
+                combo.pop()
+                state.remove(rows[k])
+            return False
 
-            if(G.isSolutionOfAccessibility(certificate)):
-                return certificate
+        if extend(0):
+            return [stations[k] for k in combo]
         return False
         
\ No newline at end of file
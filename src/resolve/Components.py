@@ -0,0 +1,112 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from ..Edge import Edge
+from ..GraphCore import CoverageMatrix
+from .Transposition import TableStats
+
+
+def components(coverage):
+    """
+    Connected components of the bipartite station/site graph of a coverage matrix.
+
+    A component grows from one site by OR-ing the masks of its stations and of their sites
+    until the sites stop changing, so each component costs the number of its edges.
+
+    Returns:
+        list: (station rows, site rows) of every component holding at least one site, in the
+        order of their first site.
+    """
+    remaining = coverage.full
+    result = []
+    while remaining:
+        sites = remaining & -remaining
+        stations = 0
+        frontier = sites
+        while frontier:
+            reached = 0
+            for o in CoverageMatrix.positions(frontier):
+                reached |= coverage.site_masks[o]
+            new_stations = reached & ~stations
+            stations |= new_stations
+            grown = 0
+            for s in CoverageMatrix.positions(new_stations):
+                grown |= coverage.station_masks[s]
+            frontier = grown & ~sites
+            sites |= frontier
+        remaining &= ~sites
+        result.append((CoverageMatrix.positions(stations), CoverageMatrix.positions(sites)))
+    return result
+
+
+def component_graph(graph, kernel, stations, sites):
+    """
+    A graph of the same class as `graph` holding one component of a kernel: its stations and
+    sites, and new edges between them (the vertices are shared, not copied).
+    """
+    coverage = kernel.coverage
+    station_vertices = [coverage.stations[s] for s in stations]
+    site_vertices = [coverage.sites[o] for o in sites]
+    edges = [Edge(coverage.stations[s], coverage.sites[o], kernel.core.weight(s, o))
+             for s in stations for o in coverage.sites_of(s)]
+    return graph.__class__(station_vertices + site_vertices, site_vertices, station_vertices, edges,
+                           name=f"{getattr(graph, 'name', 'graph')} component")
+
+
+def _solve_component(solver, graph, collect=False):
+    # run in a worker: the stations come back as positions, the objects being copies, and the
+    # transposition table counters of the component come back with them when `collect` is set
+    stats = TableStats() if collect else None
+    solution = solver(graph) if stats is None else solver(graph, stats=stats)
+    if not solution:
+        return None, stats
+    position = {id(s): k for k, s in enumerate(graph.getStations())}
+    return [position[id(s)] for s in solution], stats
+
+
+def solve_by_components(graph, solver, workers=None, stats=None):
+    """
+    Solve every connected component of the kernel of a graph on its own and join the covers.
+
+    Sites sharing no station never constrain each other, so a minimum cover of the graph is
+    the forced stations of its kernel (see Kernel.Kernel) plus a minimum cover of every
+    component of the kernel. The components are solved concurrently in a process pool when
+    there are several of them, and the cost becomes a sum of small exponentials.
+
+    Parameters:
+        graph (Graph): Graph to solve (Graph or Graph2).
+        solver (callable): Takes a graph and returns its solution stations, or a false value
+            when there is none, e.g. `BruteForce.solve` or `functools.partial(ensemble_dominant,
+            S=set(), k=32)`. It must be picklable to run in the pool.
+        workers (int): Number of processes, one per core by default, 1 to solve in this process.
+        stats (TableStats): Sums the transposition table counters of every component when
+            given; `solver` then takes a `stats` keyword, as `ensemble_dominant` and
+            `BranchBound.solve` do.
+
+    Returns:
+        list: The stations of the solution, False when some site has no station.
+    """
+    kernel = graph.get_kernel()
+    if not kernel.feasible:
+        print("No solution found")
+        return False
+    coverage = kernel.coverage
+    parts = [component_graph(graph, kernel, stations, sites) for stations, sites in components(coverage)]
+    print(f"{len(parts)} independent components, sizes: {[len(p.getOlympics()) for p in parts]}")
+
+    workers = min(workers or os.cpu_count() or 1, len(parts))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_solve_component, [solver] * len(parts), parts,
+                                        [stats is not None] * len(parts)))
+    else:
+        results = [_solve_component(solver, part, stats is not None) for part in parts]
+
+    selected = []
+    for part, (result, component_stats) in zip(parts, results):
+        if stats is not None:
+            stats.add(component_stats)
+        if result is None:
+            return False
+        selected += [part.getStations()[k] for k in result]
+    return kernel.solution(selected)
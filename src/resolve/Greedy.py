@@ -0,0 +1,145 @@
+import heapq
+
+from ..Graph import Graph
+from ..GraphCore import CoverageMatrix, CoverageState
+
+
+class Greedy:
+    """
+    Heuristic cover: lazy greedy set cover, then local search on the cover counts of the sites.
+
+    The greedy pass takes the station covering the most uncovered sites until every site is
+    covered. Gains only decrease, so they sit in a heap and a popped gain is recomputed (one
+    mask AND) and taken only when it is still the largest. The local search then repeats, until
+    none applies:
+        - removing a redundant station, whose sites are all covered twice or more;
+        - replacing two stations by one covering every site only they cover (2-for-1);
+        - replacing one station by another covering every site only it covers, when this covers
+          more sites twice (1-swap; it keeps the size but opens the other two moves).
+    Each move strictly decreases the size or keeps it and increases the number of sites covered
+    twice or more, so the search ends.
+
+    Sites are bits of their rank, as in CoverageState.
+
+    Attributes:
+        state (CoverageState): The cover, updated in place.
+        moves (dict): Number of moves of every kind made by the local search.
+    """
+
+    def __init__(self, coverage):
+        self.coverage = coverage
+        self.masks = coverage.rank_masks
+        self.candidates = [coverage.site_masks[o] for o in coverage.order]
+        self.state = CoverageState(coverage)
+        self.moves = {"redundant": 0, "two_for_one": 0, "swap": 0}
+
+    def greedy(self):
+        """Add the stations of a greedy cover to `state`."""
+        state, masks = self.state, self.masks
+        heap = [(-(masks[s] & state.uncovered).bit_count(), s) for s in range(len(masks))]
+        heapq.heapify(heap)
+        while state.uncovered and heap:
+            gain, s = heapq.heappop(heap)
+            current = (masks[s] & state.uncovered).bit_count()
+            if current == 0:
+                continue
+            if -gain != current and heap and -heap[0][0] > current:
+                heapq.heappush(heap, (-current, s))
+                continue
+            state.add(s)
+
+    def spare(self):
+        """Masks of the sites covered exactly once and exactly twice by the cover."""
+        once = twice = 0
+        rank = self.coverage.rank
+        for o, count in enumerate(self.state.counts):
+            if count == 1:
+                once |= 1 << rank[o]
+            elif count == 2:
+                twice |= 1 << rank[o]
+        return once, twice
+
+    def covering(self, sites, excluded):
+        """Stations covering every site of the mask `sites`, minus the stations of `excluded`."""
+        stations = (1 << len(self.masks)) - 1
+        for r in CoverageMatrix.positions(sites):
+            stations &= self.candidates[r]
+            if not stations:
+                break
+        return stations & ~excluded
+
+    def remove_redundant(self, once):
+        for s in sorted(self.state.selected, key=lambda s: self.masks[s].bit_count()):
+            if self.masks[s] & once == 0:
+                self.state.remove(s)
+                self.moves["redundant"] += 1
+                return True
+        return False
+
+    def two_for_one(self, once, twice, selection):
+        masks, selected = self.masks, self.state.selected
+        for i, a in enumerate(selected):
+            for b in selected[i + 1:]:
+                needed = (masks[a] | masks[b]) & once | masks[a] & masks[b] & twice
+                stations = self.covering(needed, selection)
+                if stations:
+                    c = max(CoverageMatrix.positions(stations), key=lambda c: masks[c].bit_count())
+                    self.state.remove(a)
+                    self.state.remove(b)
+                    self.state.add(c)
+                    self.moves["two_for_one"] += 1
+                    return True
+        return False
+
+    def swap(self, once, twice, selection):
+        masks = self.masks
+        for a in self.state.selected:
+            stations = self.covering(masks[a] & once, selection)
+            if not stations:
+                continue
+            # sites covered twice or more lost by removing `a`, won by adding `c`
+            lost = (masks[a] & twice).bit_count()
+            kept_once = once & ~masks[a] | masks[a] & twice
+            c = max(CoverageMatrix.positions(stations), key=lambda c: (masks[c] & kept_once).bit_count())
+            if (masks[c] & kept_once).bit_count() > lost:
+                self.state.remove(a)
+                self.state.add(c)
+                self.moves["swap"] += 1
+                return True
+        return False
+
+    def improve(self):
+        """Run the local search on `state`."""
+        while True:
+            once, twice = self.spare()
+            selection = CoverageMatrix.mask(self.state.selected)
+            if not (self.remove_redundant(once) or self.two_for_one(once, twice, selection)
+                    or self.swap(once, twice, selection)):
+                return
+
+    def cover(self):
+        """Rows of the stations of a cover of every site, greedy then improved."""
+        self.greedy()
+        self.improve()
+        return list(self.state.selected)
+
+    @staticmethod
+    def solve(G: Graph):
+        """
+        Small set of stations covering every site of G, False when some site has no station.
+
+        The cover is searched on the kernel of G (see Kernel.Kernel), whose forced stations are
+        added back. It is not always minimum, but it takes milliseconds and bounds the exact
+        solvers.
+        """
+        kernel = G.get_kernel()
+        if not kernel.feasible:
+            print("No solution found")
+            return False
+        coverage = kernel.coverage
+        search = Greedy(coverage)
+        search.greedy()
+        size = len(search.state.selected)
+        search.improve()
+        print(f"Greedy cover: {size} stations, {len(search.state.selected)} after local search {search.moves}")
+        return kernel.solution([coverage.stations[s] for s in search.state.selected])
@@ -19,10 +19,18 @@ class Progress:
 
     
         G.makeprofiles()
-        profiles = Progress.getprofiles(G)
-        sorted_profiles = Progress.sort_profile(profiles)
-        prime_profiles = Progress.eliminate_weak(sorted_profiles)
-        station_to_modify = Progress.search_union(prime_profiles)
+        #the union is searched over the kernel of G (see Kernel.Kernel), its forced stations
+        #are part of the solution whatever the union found
+        kernel = G.get_kernel()
+        station_to_modify = []
+        if kernel.coverage.sites:
+            profiles = Progress.kernel_profiles(kernel)
+            sorted_profiles = Progress.sort_profile(profiles)
+            prime_profiles = Progress.eliminate_weak(sorted_profiles)
+            station_to_modify = Progress.search_union(prime_profiles)
+            if station_to_modify == False:
+                return False
+        station_to_modify = kernel.solution(station_to_modify)
 
         for s in station_to_modify:
             s.belongSolution()
@@ -83,13 +91,14 @@ class Progress:
                 return False
             
             olympic_to_remove = []
+            coverage = G.get_coverage()
             for o in olympics_notused:
                     
                 cpt_dominance = 0
 
                 for sta in station_to_modify:
                     
-                    if not G.are_adjacent( o,sta):
+                    if not coverage.adjacent(o, sta):
                         
                         cpt_dominance +=1
                     
@@ -158,18 +167,16 @@ class Progress:
     @staticmethod
     def make_full_profile(G:Graph, s:Station):
         
-        olymp = G.getOlympics()
-        profile_index = 0
+        coverage = G.get_coverage()
         okprofile = s.getprofile()
         copy = bitarray.copy(okprofile)
 
-        while(len(copy) < len(olymp)):
+        while(len(copy) < len(coverage.sites)):
             copy.append(0)
             
-        for o in olymp:
-            if G.are_adjacent(s, o):
-                copy[profile_index]=1
-            profile_index +=1
+        #set bits of the station's coverage row
+        for profile_index in coverage.sites_of(coverage.station_index[id(s)]):
+            copy[profile_index]=1
 
         return copy
     
@@ -252,6 +259,22 @@ class Progress:
         return False
                 
     
+    #profiles of the kernel stations over the kernel sites only
+    @staticmethod
+    def kernel_profiles(kernel):
+
+        coverage = kernel.coverage
+        profiles = []
+
+        for s, sta in enumerate(coverage.stations):
+
+            profile = zeros(len(coverage.sites))
+            for profile_index in coverage.sites_of(s):
+                profile[profile_index] = 1
+            profiles.append((profile, sta))
+
+        return profiles
+
     @staticmethod
     def getprofiles( G: Graph):
 
@@ -0,0 +1,98 @@
+import sys
+from collections import OrderedDict
+
+# Default memory cap of a table, in bytes
+DEFAULT_MEMORY = 64 << 20
+# Bytes of an OrderedDict entry besides its key and value objects (hash slot, links, tuple)
+ENTRY_OVERHEAD = 200
+
+
+class TranspositionTable:
+    """
+    Bounded memo of the search states already explored, keyed by the mask of uncovered sites.
+
+    The same uncovered sites are reached through many selections (A then B, B then A, or any
+    other stations covering the same sites). A state explored with `depth` stations selected
+    and the stations of the mask `allowed` still available found every completion with fewer
+    stations than the best cover of the time; reaching it again with as many stations selected
+    or more, and no station that was not allowed then, cannot find a better cover, so its
+    subtree is cut. `allowed` is None for searches where every station stays allowed.
+
+    Entries are evicted least recently used first once their estimated size exceeds `memory`
+    bytes.
+
+    Attributes:
+        hits (int): Probes cut by the table.
+        misses (int): Probes that went on with the search (and stored their state).
+        evictions (int): Entries dropped to stay within the memory cap.
+    """
+
+    def __init__(self, memory=DEFAULT_MEMORY):
+        self.memory = memory
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def entry_size(uncovered, allowed):
+        return ENTRY_OVERHEAD + sys.getsizeof(uncovered) + (0 if allowed is None else sys.getsizeof(allowed))
+
+    def seen(self, uncovered, depth, allowed=None):
+        """
+        Whether the state was already explored with at most `depth` stations and at least the
+        stations of `allowed`; if not, it is recorded as explored now.
+        """
+        entries = self.entries
+        entry = entries.get(uncovered)
+        if entry is not None:
+            seen_depth, seen_allowed = entry
+            if seen_depth <= depth and (allowed is None or allowed & ~seen_allowed == 0):
+                entries.move_to_end(uncovered)
+                self.hits += 1
+                return True
+            self.size -= self.entry_size(uncovered, seen_allowed)
+            del entries[uncovered]
+        self.misses += 1
+        if self.memory <= 0:
+            return False
+
+        entries[uncovered] = (depth, allowed)
+        self.size += self.entry_size(uncovered, allowed)
+        while self.size > self.memory and entries:
+            key, (_, old_allowed) = entries.popitem(last=False)
+            self.size -= self.entry_size(key, old_allowed)
+            self.evictions += 1
+        return False
+
+
+class TableStats:
+    """
+    Counters of the transposition tables of several searches (one per component, or per run
+    of a benchmark), summed so they can be reported once.
+    """
+
+    def __init__(self):
+        self.searches = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def add(self, table):
+        """Count the probes of a finished search's table (a TranspositionTable or TableStats)."""
+        self.searches += getattr(table, "searches", 1)
+        self.hits += table.hits
+        self.misses += table.misses
+        self.evictions += table.evictions
+
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def __str__(self):
+        return (f"{self.hits} hits / {self.hits + self.misses} probes ({self.hit_rate():.1%}) "
+                f"over {self.searches} searches, {self.evictions} states evicted")
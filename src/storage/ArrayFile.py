@@ -0,0 +1,123 @@
+import json
+import os
+import struct
+import numpy as np
+
+# Arrays start on multiples of this many bytes so they can be memory-mapped in place
+ALIGNMENT = 64
+PREAMBLE = struct.Struct("<8sII")  # magic, schema version, header length
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_arrays(path, magic, version, arrays, meta=None):
+    """
+    Write named NumPy arrays and a JSON metadata dictionary to a single binary file.
+
+    Layout:
+        8 bytes   magic identifying the kind of file
+        4 bytes   schema version (little-endian uint32)
+        4 bytes   length of the JSON header (little-endian uint32)
+        header    {"meta": {...}, "arrays": {name: {"dtype", "shape", "offset"}}}
+        arrays    raw little-endian data, each one starting on a 64 bytes boundary
+
+    The file is written next to its destination and renamed over it, so concurrent readers
+    see either the previous file or the complete new one.
+    """
+    arrays = {name: np.ascontiguousarray(a, dtype=np.asarray(a).dtype.newbyteorder("<")) for name, a in arrays.items()}
+    table = {}
+    header = b""
+    # the offsets depend on the header length, which depends on the offsets: iterate until stable
+    while True:
+        offset = _aligned(PREAMBLE.size + len(header))
+        table = {}
+        for name, a in arrays.items():
+            table[name] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+            offset = _aligned(offset + a.nbytes)
+        encoded = json.dumps({"meta": meta or {}, "arrays": table}, sort_keys=True).encode("utf-8")
+        stable = len(encoded) == len(header)
+        header = encoded
+        if stable:
+            break
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(PREAMBLE.pack(magic, version, len(header)))
+        file.write(header)
+        for name, a in arrays.items():
+            file.seek(table[name]["offset"])
+            file.write(a.tobytes())
+    os.replace(temporary, path)
+
+
+def pack_strings(strings):
+    """Strings as one UTF-8 blob (uint8 array) and the int64 offsets of every string in it."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def is_integer_column(values):
+    """Whether every value is an int or None (bools excluded)."""
+    return all(v is None or (isinstance(v, int) and not isinstance(v, bool)) for v in values)
+
+
+def pack_integers(values):
+    """A column of ints and None as int64 values (0 for None) and a bool null mask."""
+    values = list(values)
+    return (np.array([0 if v is None else v for v in values], dtype=np.int64),
+            np.array([v is None for v in values], dtype=bool))
+
+
+def unpack_integers(values, null):
+    """The column packed by `pack_integers`, None where `null` is set."""
+    return [None if n else v for v, n in zip(np.asarray(values).tolist(), np.asarray(null).tolist())]
+
+
+def unpack_strings(blob, offsets):
+    """The strings packed by `pack_strings`."""
+    data = np.asarray(blob).tobytes()
+    offsets = np.asarray(offsets).tolist()
+    return [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+class ArrayFile:
+    """
+    Read-only view of a file written by `write_arrays`.
+
+    Only the header is read when the file is opened; every array is memory-mapped the first
+    time it is accessed, so loading is almost free and many processes can share the pages.
+
+    Raises:
+        ValueError: when the file is of another kind or of another schema version.
+    """
+
+    def __init__(self, path, magic, version):
+        self.path = path
+        with open(path, "rb") as file:
+            found_magic, found_version, length = PREAMBLE.unpack(file.read(PREAMBLE.size))
+            if found_magic != magic:
+                raise ValueError(f"{path} is not a {magic.decode(errors='replace')} file")
+            if found_version != version:
+                raise ValueError(f"{path} has schema version {found_version}, version {version} is required")
+            header = json.loads(file.read(length).decode("utf-8"))
+        self.meta = header["meta"]
+        self.layout = header["arrays"]
+        self.arrays = {}
+
+    def __contains__(self, name):
+        return name in self.layout
+
+    def __getitem__(self, name):
+        if name not in self.arrays:
+            spec = self.layout[name]
+            dtype = np.dtype(spec["dtype"])
+            shape = tuple(spec["shape"])
+            if int(np.prod(shape)) == 0:
+                self.arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                self.arrays[name] = np.memmap(self.path, dtype=dtype, mode="r", offset=spec["offset"], shape=shape)
+        return self.arrays[name]
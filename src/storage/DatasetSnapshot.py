@@ -0,0 +1,85 @@
+import os
+import numpy as np
+
+from .ArrayFile import (ArrayFile, write_arrays, pack_strings, unpack_strings, is_integer_column,
+                        pack_integers, unpack_integers)
+from ..network.DistanceCache import file_digest
+
+MAGIC = b"MDSSDATA"
+VERSION = 1
+
+
+def snapshot_path(source):
+    """The snapshot of a dataset file lives next to it: data/x.json -> data/x.json.snapshot."""
+    return f"{source}.snapshot"
+
+
+def source_stamp(source):
+    """Size and modification time of a file, checked before its hash."""
+    status = os.stat(source)
+    return {"size": status.st_size, "mtime_ns": status.st_mtime_ns}
+
+
+def write_snapshot(path, source, latitude, longitude, columns):
+    """
+    Store a projected dataset table (see parser.station_table.StationTable) in an ArrayFile.
+
+    Integer columns (None allowed) are int64 arrays with a null mask, every other column is
+    stored as texts through one shared string table. The metadata records the size, the
+    modification time and the hash of `source`, so `load_snapshot` notices when it changes.
+    """
+    strings = {}
+    arrays = {"latitude": np.asarray(latitude, dtype=float), "longitude": np.asarray(longitude, dtype=float)}
+    kinds = {}
+    for field, values in columns.items():
+        if is_integer_column(values):
+            kinds[field] = "int"
+            arrays[f"{field}.value"], arrays[f"{field}.null"] = pack_integers(values)
+        else:
+            kinds[field] = "str"
+            arrays[f"{field}.value"] = np.array([-1 if v is None else strings.setdefault(str(v), len(strings))
+                                                 for v in values], dtype=np.int32)
+    arrays["strings"], arrays["string_offsets"] = pack_strings(strings)
+    meta = dict(source_stamp(source), source=os.path.basename(source), sha256=file_digest(source),
+                fields=list(columns), kinds=kinds)
+    write_arrays(path, MAGIC, VERSION, arrays, meta)
+
+
+def load_snapshot(path, source, fields):
+    """
+    Columns stored by `write_snapshot`, as (latitude, longitude, {field: list}), or None when
+    there is no snapshot, it has other fields or an older schema, or `source` changed.
+
+    An unchanged size and modification time are trusted as is; otherwise the file is hashed,
+    so a dataset copied or touched without being changed still hits the snapshot, whose
+    modification time is then updated.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        data = ArrayFile(path, MAGIC, VERSION)
+    except ValueError as e:
+        print(f"Ignoring dataset snapshot {path}: {e}")
+        return None
+    meta = data.meta
+    if meta.get("fields") != list(fields):
+        return None
+    stamp = source_stamp(source)
+    if (meta.get("size"), meta.get("mtime_ns")) != (stamp["size"], stamp["mtime_ns"]):
+        if meta.get("size") != stamp["size"] or meta.get("sha256") != file_digest(source):
+            return None
+        # same content: store the new modification time, so the next runs skip the hash
+        try:
+            write_arrays(path, MAGIC, VERSION, {name: np.array(data[name]) for name in data.layout},
+                         dict(meta, **stamp))
+        except OSError as e:
+            print(f"Dataset snapshot {path} not refreshed: {e}")
+
+    strings = unpack_strings(data["strings"], data["string_offsets"])
+    columns = {}
+    for field in fields:
+        if meta["kinds"][field] == "int":
+            columns[field] = unpack_integers(data[f"{field}.value"], data[f"{field}.null"])
+        else:
+            columns[field] = [None if k < 0 else strings[k] for k in data[f"{field}.value"].tolist()]
+    return data["latitude"].tolist(), data["longitude"].tolist(), columns
@@ -0,0 +1,241 @@
+import sys
+import numpy as np
+
+from .ArrayFile import (ArrayFile, write_arrays, pack_strings, unpack_strings, is_integer_column,
+                        pack_integers, unpack_integers)
+from ..Edge import Edge
+from ..Geopoint import Geopoint
+from ..GraphCore import GraphCore, VERTEX_LISTS, TRANSIENT
+from ..Olympic import Olympic
+from ..Station import Station
+
+MAGIC = b"MDSSGRPH"
+VERSION = 2
+
+# Graph attributes stored as arrays rather than in the metadata
+STRUCTURE = VERTEX_LISTS + TRANSIENT + ("edges", "cached_edges")
+
+
+def _encode_strings(values, strings):
+    """Position of every value in the shared string table `strings` (extended), -1 for None."""
+    positions = []
+    for value in values:
+        if value is None:
+            positions.append(-1)
+        else:
+            positions.append(strings.setdefault(str(value), len(strings)))
+    return np.array(positions, dtype=np.int32)
+
+
+def write_graph(path, graph, meta=None):
+    """
+    Write a bipartite station/site graph to a versioned, memory-mappable file.
+
+    The file is an `ArrayFile` (magic MDSSGRPH, schema version VERSION) holding:
+        strings, string_offsets   every distinct text (names, colors, line indices, lines)
+                                  once, as a UTF-8 blob and int64 offsets
+        is_station                bool per vertex, in the order of `graph.vertices`
+        latitude, longitude       float64 per vertex
+        name, color               int32 per vertex, position in the string table (-1: None)
+        station_vertex            int32 per station, its vertex position
+        line_index                int32 per station, position in the string table
+        station_id, station_id_null
+                                  int64 per station and its null mask, when every id is an
+                                  int or None (the dataset `id_gares`); otherwise int32
+                                  positions in the string table, as told by the metadata
+                                  `station_id_kind` ("int" or "str")
+        lines_indptr, lines       CSR of the lines of every station (string positions);
+        has_lines                 stations without a `lines` list have has_lines False
+        solution                  bool per station
+        <list>                    int32 vertex positions of every vertex list of the graph
+                                  (vertices, stations, olympics, progressOlympics)
+        edge_indptr               CSR by station (one row per `station_vertex`) of the edges:
+        edge_site, edge_weight    vertex position of the site and walking time (minutes)
+        edge_listed, edge_cached  bool per edge: in `graph.edges`, in `graph.cached_edges`
+    The metadata holds the graph class, its scalar attributes and any `meta` given, such as the
+    walking time threshold and the hashes of the datasets the graph was built from.
+    Station profiles are not stored; `makeprofiles` rebuilds them.
+
+    Parameters:
+        path (str): File to write.
+        graph (Graph): Graph or Graph2 to store.
+        meta (dict): JSON-serialisable metadata to store with it.
+    """
+    vertices = graph.vertices
+    position = {id(v): i for i, v in enumerate(vertices)}
+    strings = {}
+    stations = [v for v in vertices if isinstance(v, Station)]
+    station_row = {id(s): i for i, s in enumerate(stations)}
+
+    lines = [s.lines or [] for s in stations]
+    lines_indptr = np.zeros(len(stations) + 1, dtype=np.int64)
+    np.cumsum([len(line) for line in lines], out=lines_indptr[1:])
+
+    arrays = {
+        "is_station": np.array([isinstance(v, Station) for v in vertices], dtype=bool),
+        "latitude": np.array([v.geopoint.latitude for v in vertices], dtype=float),
+        "longitude": np.array([v.geopoint.longitude for v in vertices], dtype=float),
+        "name": _encode_strings((v.name for v in vertices), strings),
+        "color": _encode_strings((v.color for v in vertices), strings),
+        "station_vertex": np.array([position[id(s)] for s in stations], dtype=np.int32),
+        "line_index": _encode_strings((s.line_index for s in stations), strings),
+        "lines_indptr": lines_indptr,
+        "lines": _encode_strings((line for station_lines in lines for line in station_lines), strings),
+        "has_lines": np.array([s.lines is not None for s in stations], dtype=bool),
+        "solution": np.array([s.solution for s in stations], dtype=bool),
+    }
+    station_ids = [s.station_id for s in stations]
+    if is_integer_column(station_ids):
+        station_id_kind = "int"
+        arrays["station_id"], arrays["station_id_null"] = pack_integers(station_ids)
+    else:
+        station_id_kind = "str"
+        arrays["station_id"] = _encode_strings(station_ids, strings)
+    for name in VERTEX_LISTS:
+        if name in graph.__dict__:
+            arrays[name] = np.array([position[id(v)] for v in getattr(graph, name)], dtype=np.int32)
+
+    cached = {id(e) for e in graph.cached_edges}
+    listed = {id(e) for e in graph.edges}
+    edges = list(graph.edges) + [e for e in graph.cached_edges if id(e) not in listed]
+    rows, sites = [], []
+    for edge in edges:
+        station, site = edge.vertex1, edge.vertex2
+        if id(station) not in station_row:
+            station, site = site, station
+        rows.append(station_row[id(station)])
+        sites.append(position[id(site)])
+    order = np.argsort(np.array(rows, dtype=np.int64), kind="stable")
+    arrays["edge_indptr"] = GraphCore.indptr(np.array(rows, dtype=np.int64), len(stations))
+    arrays["edge_site"] = np.array(sites, dtype=np.int32)[order]
+    arrays["edge_weight"] = np.array([e.weight for e in edges], dtype=float)[order]
+    arrays["edge_listed"] = np.array([id(e) in listed for e in edges], dtype=bool)[order]
+    arrays["edge_cached"] = np.array([id(e) in cached for e in edges], dtype=bool)[order]
+    arrays["strings"], arrays["string_offsets"] = pack_strings(strings)
+
+    attributes = {k: v for k, v in graph.__dict__.items()
+                  if k not in STRUCTURE and isinstance(v, (str, int, float, bool, type(None)))}
+    header = dict(meta or {}, graph_class=f"{type(graph).__module__}.{type(graph).__name__}",
+                  attributes=attributes, vertex_count=len(vertices), station_count=len(stations),
+                  edge_count=len(edges), station_id_kind=station_id_kind)
+    write_arrays(path, MAGIC, VERSION, arrays, header)
+
+
+def is_graph_file(path):
+    """Whether a file starts with the magic of a graph file, whatever its schema version."""
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+class GraphFile:
+    """
+    Read-only view of a file written by `write_graph`.
+
+    Opening a file only reads its header; the arrays are memory-mapped when first used, so
+    many worker processes can open the same file at almost no cost and share its pages.
+    `graph()` rebuilds the Graph itself.
+
+    Raises:
+        ValueError: when the file is not a graph file or its schema version is out of date.
+    """
+
+    def __init__(self, path):
+        self.data = ArrayFile(path, MAGIC, VERSION)
+        self.meta = self.data.meta
+
+    def strings(self):
+        return unpack_strings(self.data["strings"], self.data["string_offsets"])
+
+    def graph(self):
+        """Rebuild the vertices, edges and adjacencies of the stored graph."""
+        data = self.data
+        strings = self.strings()
+
+        def text(k):
+            return None if k < 0 else strings[k]
+
+        vertices = []
+        station_vertex = set(data["station_vertex"].tolist())
+        names, colors = data["name"].tolist(), data["color"].tolist()
+        latitude, longitude = data["latitude"].tolist(), data["longitude"].tolist()
+        for i in range(len(names)):
+            geopoint = Geopoint(latitude[i], longitude[i])
+            if i in station_vertex:
+                vertices.append(None)  # filled below, in station order
+            else:
+                vertices.append(Olympic(geopoint, text(names[i]), color=text(colors[i])))
+
+        lines_indptr, lines = data["lines_indptr"].tolist(), data["lines"].tolist()
+        has_lines, solution = data["has_lines"].tolist(), data["solution"].tolist()
+        line_index = data["line_index"].tolist()
+        if self.meta["station_id_kind"] == "int":
+            station_id = unpack_integers(data["station_id"], data["station_id_null"])
+        else:
+            station_id = [text(k) for k in data["station_id"].tolist()]
+        stations = []
+        for s, i in enumerate(data["station_vertex"].tolist()):
+            station_lines = [text(k) for k in lines[lines_indptr[s]:lines_indptr[s + 1]]] if has_lines[s] else None
+            station = Station(Geopoint(latitude[i], longitude[i]), text(names[i]), text(line_index[s]),
+                              color=text(colors[i]), station_id=station_id[s], lines=station_lines)
+            station.solution = solution[s]
+            vertices[i] = station
+            stations.append(station)
+
+        module, _, name = self.meta["graph_class"].rpartition(".")
+        cls = getattr(__import__(module, fromlist=[name]), name)
+        graph = cls.__new__(cls)
+        graph.__dict__.update(self.meta["attributes"])
+        for list_name in VERTEX_LISTS:
+            if list_name in data:
+                graph.__dict__[list_name] = [vertices[i] for i in data[list_name].tolist()]
+        graph.__dict__.setdefault("progressOlympics", [])
+
+        graph.edges, graph.cached_edges = [], []
+        indptr, sites, weights = data["edge_indptr"].tolist(), data["edge_site"].tolist(), data["edge_weight"].tolist()
+        listed, cached = data["edge_listed"].tolist(), data["edge_cached"].tolist()
+        for s, station in enumerate(stations):
+            for e in range(indptr[s], indptr[s + 1]):
+                site = vertices[sites[e]]
+                station.addadja(site)
+                site.addadja(station)
+                edge = Edge(station, site, weights[e])
+                if listed[e]:
+                    graph.edges.append(edge)
+                if cached[e]:
+                    graph.cached_edges.append(edge)
+        return graph
+
+
+def round_trip_changes(graph, path):
+    """
+    Stations and sites that `network.Delta.merge` sees as changed or stale between `graph` and
+    the graph read back from the file `path`; a faithful file gives (0, 0, 0, 0).
+
+    Returns:
+        tuple: (changed stations, stale stations, changed sites, stale sites)
+    """
+    from ..network.Delta import merge, station_key, site_key
+
+    stored = GraphFile(path).graph()
+    _, changed_stations, stale_stations = merge(stored.getStations(), graph.getStations(), station_key)
+    _, changed_sites, stale_sites = merge(stored.getOlympics(), graph.getOlympics(), site_key)
+    return len(changed_stations), len(stale_stations), len(changed_sites), len(stale_sites)
+
+
+if __name__ == "__main__":
+    # python3 -m src.storage.GraphFile <pickled graph> <graph file>
+    # converts a pickle written by utils.save_graph ({"graph", "x"}) or a pickled graph
+    import pickle
+
+    sys.setrecursionlimit(20000)
+    with open(sys.argv[1], "rb") as f:
+        data = pickle.load(f)
+    if isinstance(data, dict):
+        graph = data["graph"]
+        write_graph(sys.argv[2], graph, {"x": data["x"], "source": sys.argv[1]})
+    else:
+        graph = data
+        write_graph(sys.argv[2], graph, {"source": sys.argv[1]})
+    changes = round_trip_changes(graph, sys.argv[2])
+    if any(changes):
+        sys.exit("Round trip changed %d stations (%d stale) and %d sites (%d stale)" % changes)
@@ -0,0 +1,36 @@
+import random
+
+from src.Edge import Edge
+from src.Geopoint import Geopoint
+from src.Graph import Graph
+from src.Olympic import Olympic
+from src.Station import Station
+from src.resolve.BandB import ensemble_dominant
+from src.resolve.Transposition import TableStats
+
+
+def random_graph(seed, n_stations=14, n_sites=12):
+    rng = random.Random(seed)
+    stations = [Station(Geopoint(48.8, 2.3), f"s{i}", str(i)) for i in range(n_stations)]
+    sites = [Olympic(Geopoint(48.9, 2.4), f"o{j}") for j in range(n_sites)]
+    graph = Graph(stations + sites, sites, stations)
+    for station in stations:
+        for site in rng.sample(sites, 3):
+            graph.edges.append(Edge(station, site, 1.0))
+            station.addadja(site)
+            site.addadja(station)
+    return graph
+
+
+def test_ensemble_dominant_memory_caps_the_table():
+    graph = random_graph(5)
+    sizes = {}
+    for memory in (64 << 20, 1000, 0):
+        stats = TableStats()
+        solution = ensemble_dominant(graph, stats=stats, memory=memory)
+        assert graph.isSolutionOfAccessibility(solution)
+        sizes[memory] = (len(solution), stats)
+    assert sizes[64 << 20][1].hits > 0 and sizes[64 << 20][1].evictions == 0
+    assert sizes[1000][1].evictions > 0
+    assert sizes[0][1].hits == 0
+    assert len({size for size, _ in sizes.values()}) == 1
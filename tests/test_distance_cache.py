@@ -0,0 +1,23 @@
+import os
+
+import osmnx as ox
+
+from src.network.DistanceCache import DistanceCache
+from src.network.DistanceTable import DistanceTable
+from utils import clear_osmnx_cache
+
+
+def test_distance_cache_survives_clear_osmnx_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ox.settings, "cache_folder", "./cache")
+    os.makedirs(ox.settings.cache_folder)
+
+    cache = DistanceCache()
+    key = "0" * 64
+    cache.save(key, DistanceTable.from_links([(0, 0, 120.0), (1, 0, 450.0)], 1500))
+    clear_osmnx_cache()
+
+    assert not os.path.exists(ox.settings.cache_folder)
+    table = cache.load(key)
+    assert table is not None
+    assert list(table.within(1500)) == [(0, 0, 120.0), (1, 0, 450.0)]
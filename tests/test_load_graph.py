@@ -0,0 +1,61 @@
+from src.Edge import Edge
+from src.Geopoint import Geopoint
+from src.Graph import Graph
+from src.Olympic import Olympic
+from src.Station import Station
+from src.network.DistanceCache import DistanceCache
+from src.network.DistanceTable import DistanceTable
+from src.network.Provider import OverpassProvider
+from utils import distance_source_key, load_graph, load_or_create_walking_graph, save_graph
+
+
+def link(graph, station, site, minutes):
+    graph.edges.append(Edge(station, site, minutes))
+    station.addadja(site)
+    site.addadja(station)
+
+
+def test_derive_after_good_olympics(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    a = Olympic(Geopoint(48.80, 2.30), "A")
+    b = Olympic(Geopoint(48.81, 2.31), "B")  # no station in reach, dropped by goodOlympics
+    c = Olympic(Geopoint(48.82, 2.32), "C")
+    s1 = Station(Geopoint(48.83, 2.33), "s1", "0")
+    s2 = Station(Geopoint(48.84, 2.34), "s2", "1")
+    # sites before stations and between them, so vertex order and list order differ
+    graph = Graph([a, b, s1, c, s2], [a, b, c], [s1, s2])
+    link(graph, s1, a, 5.0)
+    link(graph, s1, c, 8.0)
+    link(graph, s2, c, 3.0)
+    assert graph.goodOlympics() == (2, [b])
+    save_graph(graph, 10)
+
+    derived = load_graph(6)
+
+    assert [o.name for o in derived.getOlympics()] == ["A", "C"]
+    pairs = sorted((e.vertex1.name, e.vertex2.name, round(e.weight, 6)) for e in derived.edges)
+    assert pairs == [("s1", "A", 5.0), ("s2", "C", 3.0)]
+
+
+def test_walking_graph_is_saved_and_reused(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    provider = OverpassProvider()
+    stations = [Station(Geopoint(48.83, 2.33), "s1", "0"), Station(Geopoint(48.84, 2.34), "s2", "1")]
+    olympics = [Olympic(Geopoint(48.80, 2.30), "A"), Olympic(Geopoint(48.82, 2.32), "C")]
+    # only the cached distances are read, the network is never queried
+    DistanceCache().save(distance_source_key(provider),
+                         DistanceTable.from_links([(0, 0, 375.0), (0, 1, 600.0), (1, 1, 225.0)], 1500))
+
+    built = load_or_create_walking_graph(stations, olympics, 10, provider)
+    assert "saved to processed_graph.graph" in capsys.readouterr().out
+    loaded = load_or_create_walking_graph(stations, olympics, 6, provider)
+    output = capsys.readouterr().out
+    assert "derived from the 10 minutes graph" in output
+    assert "Walking distances" not in output
+
+    assert len(built.edges) == 3
+    assert loaded.get_network_provider() is provider
+    pairs = sorted((e.vertex1.name, e.vertex2.name, round(e.weight, 6)) for e in loaded.edges)
+    assert pairs == [("s1", "A", 5.0), ("s2", "C", 3.0)]
+    # another station consolidation is another source of distances
+    assert load_graph(6, source=distance_source_key(provider, consolidation="zda")) is None
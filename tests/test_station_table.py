@@ -0,0 +1,19 @@
+import io
+import json
+
+import pytest
+
+from src.parser.station_table import iter_json_array
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 1 << 16])
+def test_iter_json_array_numbers_across_chunks(chunk_size):
+    assert list(iter_json_array(io.StringIO("[1, 23, 456]"), chunk_size)) == [1, 23, 456]
+    assert list(iter_json_array(io.StringIO("[1.25,-7e3,0.5E-2,10]"), chunk_size)) == [1.25, -7e3, 0.5e-2, 10]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 1 << 16])
+def test_iter_json_array_mixed_elements(chunk_size):
+    elements = [{"nom": "Stade", "id": 12}, "abc", 3.5, True, None, [1, 2], 42]
+    text = json.dumps(elements)
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == elements
@@ -1,6 +1,19 @@
 import os
 import pickle
-from src.Graph import Graph
+from src.Graph import Graph, WALKING_SPEED
+from src.network.Provider import OverpassProvider, FileProvider
+from src.network.TileCache import TileProvider
+from src.network.DistanceTable import DistanceTable
+from src.network.Oracle import LandmarkOracle
+from src.network.DistanceCache import DistanceCache, DEFAULT_DIRECTORY, distance_cache_key, file_digest
+from src.storage.GraphFile import GraphFile, write_graph, is_graph_file
+from src.resolve.Transposition import DEFAULT_MEMORY
+from src.parser.station_parser import STATION_FILE
+from src.parser.olympic_parser import OLYMPIC_FILE
+from src.Graph2 import MPS
+
+# Largest walking time we support, the walking distances are computed once for it
+MAX_WALKING_MINUTES = 20
 
 
 def get_walking_time():
@@ -11,7 +24,7 @@ def get_walking_time():
             x = float(input("Enter walking time in minutes: "))
             if x <= 0:
                 print("Please enter a positive walking time.")
-            elif x > 20:
+            elif x > MAX_WALKING_MINUTES:
                 print("Please enter a smaller walking time.")
             else:
                 return x
@@ -24,21 +37,24 @@ def choose_method():
     print("1. Brute Force")
     print("2. Progress")
     print("3. Branch and Bound")
+    print("4. Bitset Branch and Bound")
+    print("5. Greedy heuristic")
     while True:
-        method = input("Enter your choice (1/2/3): ").strip()
-        if method in {'1', '2', '3'}:
+        method = input("Enter your choice (1/2/3/4/5): ").strip()
+        if method in {'1', '2', '3', '4', '5'}:
             return method
-        print("Invalid choice. Please enter 1, 2, or 3.")
+        print("Invalid choice. Please enter 1, 2, 3, 4, or 5.")
 
-def load_or_create_graph(vertices, olympics, stations, graph_file='fullgraph.pickle'):
+def load_or_create_graph(vertices, olympics, stations, graph_file='fullgraph.graph'):
     """
-    Handle loading or creating a graph with pickle.
+    Handle loading or creating a graph in the format of storage.GraphFile.
     
     Parameters:
         vertices (list): Combined list of stations and Olympics.
         olympics (list): List of Olympic sites.
         stations (list): List of stations.
-        graph_file (str): Path to the pickle file for saving/loading the graph.
+        graph_file (str): Path to the graph file for saving/loading the graph (a legacy
+            pickled graph is read too).
     
     Returns:
         Graph: The graph object.
@@ -48,23 +64,87 @@ def load_or_create_graph(vertices, olympics, stations, graph_file='fullgraph.pic
         if regenerate:
             # Create a new graph
             G = Graph(vertices, olympics, stations, [], name="test_graph")
-            with open(graph_file, 'wb') as file:
-                pickle.dump(G, file)
+            write_graph(graph_file, G, {"datasets": dataset_digests()})
             print(f"Graph regenerated and saved to {graph_file}.")
+        elif is_graph_file(graph_file):
+            # Load the graph file
+            G = GraphFile(graph_file).graph()
+            print(f"Graph loaded from {graph_file}.")
         else:
-            # Load the graph from the pickle file
+            # Load the graph from a legacy pickle file
             with open(graph_file, 'rb') as file:
                 G = pickle.load(file)
             print(f"Graph loaded from {graph_file}.")
     else:
-        # Create a new graph if no pickle file exists
+        # Create a new graph if no graph file exists
         print("No existing graph found. Creating a new graph...")
         G = Graph(vertices, olympics, stations, [], name="test_graph")
-        with open(graph_file, 'wb') as file:
-            pickle.dump(G, file)
+        write_graph(graph_file, G, {"datasets": dataset_digests()})
         print(f"Graph saved to {graph_file}.")
     return G
 
+def get_network_provider():
+    """
+    Return the source of the walk networks:
+    - the local file named by WALK_NETWORK_FILE (.graphml, .osm/.xml or pickled networkx graph),
+    - else tiles fetched concurrently and cached in the WALK_TILE_CACHE directory,
+    - else the Overpass API.
+    OVERPASS_URL overrides the Overpass endpoint of the last two.
+    """
+    network_file = os.environ.get("WALK_NETWORK_FILE")
+    if network_file:
+        print(f"Loading walk network from {network_file}.")
+        return FileProvider(network_file)
+    endpoint = os.environ.get("OVERPASS_URL", "https://overpass.kumi.systems/api/interpreter")
+    tile_cache = os.environ.get("WALK_TILE_CACHE")
+    if tile_cache:
+        print(f"Using walk network tiles cached in {tile_cache}.")
+        return TileProvider(tile_cache, endpoint)
+    return OverpassProvider(endpoint)
+
+def get_distance_oracle():
+    """
+    Return the walking distance oracle saved in the file named by WALK_ORACLE_FILE (built with
+    `python3 -m src.network.Oracle <walk network file> <oracle file>`), None when it is not set.
+    """
+    oracle_file = os.environ.get("WALK_ORACLE_FILE")
+    if oracle_file:
+        print(f"Loading walking distance oracle from {oracle_file}.")
+        return LandmarkOracle.load(oracle_file)
+    return None
+
+def get_station_consolidation():
+    """
+    Return how duplicate station rows are merged before solving, from STATION_CONSOLIDATION:
+    "zda" (stop area), "zdc" (interchange area), "coordinates" (same position), or None to
+    keep one station per dataset row.
+    """
+    consolidation = os.environ.get("STATION_CONSOLIDATION") or None
+    if consolidation:
+        print(f"Merging station rows by {consolidation}.")
+    return consolidation
+
+def get_station_modes():
+    """
+    Return the transport modes the stations are restricted to, from STATION_MODES
+    (comma-separated values of the dataset `mode` field, e.g. "METRO,RER,TRAMWAY"), or None
+    for every mode.
+    """
+    modes = [mode.strip().upper() for mode in os.environ.get("STATION_MODES", "").split(",") if mode.strip()]
+    if modes:
+        print(f"Keeping the {', '.join(modes)} stations only.")
+    return modes or None
+
+def get_transposition_memory():
+    """
+    Return the memory cap of the branch and bound transposition table in bytes, from
+    TRANSPOSITION_MEMORY_MB (0 disables the table), 64 MiB when it is not set.
+    """
+    memory = os.environ.get("TRANSPOSITION_MEMORY_MB")
+    if not memory:
+        return DEFAULT_MEMORY
+    return int(float(memory) * 2**20)
+
 def clear_osmnx_cache():
     """
     Clear the OSMnx cache folder to remove temporary files created during processing.
@@ -78,47 +158,156 @@ def clear_osmnx_cache():
         print(f"Cleared OSMnx cache at: {cache_dir}")
 
 
-import pickle
+def dataset_digests(dataset_files=(STATION_FILE, OLYMPIC_FILE)):
+    """Hashes of the dataset files, stored with a saved graph to detect stale files."""
+    return [file_digest(path) for path in dataset_files if os.path.exists(path)]
 
-def save_graph(graph, x, filename="processed_graph.pkl"):
-    with open(filename, "wb") as f:
-        pickle.dump({"graph": graph, "x": x}, f)
+def save_graph(graph, x, filename="processed_graph.graph", source=None):
+    """
+    Save a graph and its walking time in the memory-mappable format of storage.GraphFile.
+    `source` is the key of the walking distances it was built from, see distance_source_key.
+    """
+    meta = {"x": x, "walking_speed": WALKING_SPEED, "datasets": dataset_digests()}
+    if source is not None:
+        meta["source"] = source
+    write_graph(filename, graph, meta)
     print(f"Graph and walking time ({x} minutes) saved to {filename}.")
 
-def load_graph(x, filename="processed_graph.pkl"):
-    try:
+def read_saved_graph(filename, source=None):
+    """
+    Walking time and graph of a file written by save_graph, or of a legacy pickle of
+    {"graph", "x"}. Graph files from other datasets, other walking distances than `source`
+    (when given) or of an older schema give None.
+    """
+    if not is_graph_file(filename):
+        if source is not None:
+            print(f"{filename} does not tell which walking distances it was built from. Recalculating.")
+            return None
         with open(filename, "rb") as f:
             data = pickle.load(f)
-            saved_x = data["x"]
-            graph = data["graph"]
+        return data["x"], data["graph"]
+    try:
+        stored = GraphFile(filename)
+    except ValueError as error:
+        print(f"{error}. Recalculating.")
+        return None
+    if stored.meta.get("datasets", dataset_digests()) != dataset_digests():
+        print(f"{filename} was built from other datasets. Recalculating.")
+        return None
+    if source is not None and stored.meta.get("source") != source:
+        print(f"{filename} was built from other walking distances. Recalculating.")
+        return None
+    return stored.meta["x"], stored.graph()
 
-            if saved_x == x:
-                print(f"Graph with walking time ({x} minutes) loaded from {filename}.")
-                return graph
-            else:
-                print(f"Saved graph uses walking time ({saved_x} minutes), not {x}. Recalculating.")
-                return None
+def load_graph(x, filename="processed_graph.graph", source=None):
+    try:
+        saved = read_saved_graph(filename, source)
     except FileNotFoundError:
         print(f"No saved graph found. Proceeding with fresh calculations.")
         return None
+    if saved is None:
+        return None
+    saved_x, graph = saved
 
+    if saved_x == x:
+        print(f"Graph with walking time ({x} minutes) loaded from {filename}.")
+        return graph
+    elif saved_x > x:
+        # Every edge of the smaller graph is already in the saved one
+        print(f"Graph with walking time ({x} minutes) derived from the {saved_x} minutes graph in {filename}.")
+        table = DistanceTable.from_graph(graph, saved_x * WALKING_SPEED, WALKING_SPEED)
+        graph.clear_edges()
+        graph.apply_distance_table(table, x)
+        return graph
+    else:
+        print(f"Saved graph uses walking time ({saved_x} minutes), not {x}. Recalculating.")
+        return None
 
-def load_graph(x, filename="processed_graph.pkl"):
-    try:
-        with open(filename, "rb") as f:
-            data = pickle.load(f)
-            saved_x = data["x"]
-            graph = data["graph"]
 
-            if saved_x == x:
-                print(f"Graph with walking time ({x} minutes) loaded from {filename}.")
-                return graph
-            else:
-                print(f"Saved graph uses walking time ({saved_x} minutes), not {x}. Recalculating.")
-                return None
-    except FileNotFoundError:
-        print(f"No saved graph found. Proceeding with fresh calculations.")
-        return None
+def distance_source_key(provider, dataset_files=(STATION_FILE, OLYMPIC_FILE), consolidation=None, modes=None):
+    """
+    Key of the walking distances up to MAX_WALKING_MINUTES of the datasets read with
+    `consolidation` and `modes` (see station_parser) from `provider`, a network provider or an
+    oracle, see network.DistanceCache.distance_cache_key.
+    """
+    variant = " ".join(part for part in (f"stations {consolidation}" if consolidation else None,
+                                         f"modes {','.join(sorted(modes))}" if modes else None) if part)
+    return distance_cache_key(dataset_files, provider, MPS, MAX_WALKING_MINUTES * WALKING_SPEED, variant or None)
+
+def load_or_create_distance_table(stations, olympics, provider, cache_directory=DEFAULT_DIRECTORY,
+                                  dataset_files=(STATION_FILE, OLYMPIC_FILE), oracle=None, consolidation=None,
+                                  modes=None):
+    """
+    Walking distances of every station/site pair up to MAX_WALKING_MINUTES.
+
+    They are cached under a hash of the datasets, the network source, the walking speed and
+    MAX_WALKING_MINUTES, so they are computed once per input, and every walking time is a
+    filter over them.
+
+    Parameters:
+        stations (list): List of stations.
+        olympics (list): List of Olympic sites.
+        provider (NetworkProvider): Where the walk networks come from if they are needed.
+        cache_directory (str): Directory of the distance cache.
+        dataset_files (tuple): The dataset files the stations and sites were parsed from.
+        oracle (LandmarkOracle): Answers the distances instead of the provider when given.
+        consolidation (str): How the station rows were merged, see station_parser.
+        modes (list): Transport modes the stations were restricted to, see station_parser.
+
+    Returns:
+        DistanceTable: The walking distances.
+    """
+    max_distance = MAX_WALKING_MINUTES * WALKING_SPEED
+    cache = DistanceCache(cache_directory)
+    key = distance_source_key(oracle or provider, dataset_files, consolidation, modes)
+    table = cache.load(key)
+    if table is not None:
+        print(f"Walking distances up to {MAX_WALKING_MINUTES} minutes loaded from {cache.path(key)}.")
+        return table
+
+    if oracle is not None:
+        print(f"Querying walking distances up to {MAX_WALKING_MINUTES} minutes from the oracle...")
+        table = DistanceTable.from_oracle(oracle, stations, olympics, max_distance)
+    else:
+        print(f"Computing walking distances up to {MAX_WALKING_MINUTES} minutes...")
+        table = DistanceTable.build(stations, olympics, max_distance, provider)
+
+    print(f"Walking distances saved to {cache.save(key, table)}.")
+    return table
+
+def load_or_create_walking_graph(stations, olympics, x, provider, oracle=None, consolidation=None, modes=None,
+                                 filename="processed_graph.graph"):
+    """
+    Graph of the stations and sites within `x` walking minutes of each other.
+
+    The graph saved in `filename` is reused when it was built from the same walking distances
+    for `x` minutes or more (see load_graph); otherwise it is filtered out of the walking
+    distances (see load_or_create_distance_table) and saved for the next runs.
+
+    Parameters:
+        stations (list): List of stations.
+        olympics (list): List of Olympic sites.
+        x (float): Walking time in minutes.
+        provider (NetworkProvider): Where the walk networks come from if they are needed.
+        oracle (LandmarkOracle): Answers the distances instead of the provider when given.
+        consolidation (str): How the station rows were merged, see station_parser.
+        modes (list): Transport modes the stations were restricted to, see station_parser.
+        filename (str): File of the saved graph.
+
+    Returns:
+        Graph: The graph, with `provider` as its network provider.
+    """
+    source = distance_source_key(oracle or provider, consolidation=consolidation, modes=modes)
+    G = load_graph(x, filename, source)
+    if G is None:
+        table = load_or_create_distance_table(stations, olympics, provider, oracle=oracle,
+                                              consolidation=consolidation, modes=modes)
+        G = Graph(stations + olympics, olympics, stations, [], name="test_graph")
+        G.apply_distance_table(table, x)
+        save_graph(G, x, filename, source)
+    # the street routes of the drawn edges come from the same walk network
+    G.set_network_provider(provider)
+    return G
 
 
 #restriction are made for testing purposes